@@ -1,5 +1,4 @@
-from __future__ import division
-
+import functools
 import logging
 import operator
 import sdl2
@@ -8,9 +7,88 @@ __version__ = '0.1.14'
 __author__ = 'Cecile Tonglet'
 
 
-class Component(object):
+LIFECYCLE_METHODS = ('init', 'activate', 'deactivate', 'peek', 'render')
+
+
+class ComponentMetaclass(type):
+    # NOTE: the lifecycle methods found in the MRO are cached per class, any
+    #       change of a lifecycle method on a component class invalidates the
+    #       cache and bumps the generation so the app rebuilds its dispatch
+    lifecycle_cache = {}
+    generation = 0
+
+    def __setattr__(cls, name, value):
+        super(ComponentMetaclass, cls).__setattr__(name, value)
+        if name in LIFECYCLE_METHODS:
+            invalidate_lifecycle()
+
+    def __delattr__(cls, name):
+        super(ComponentMetaclass, cls).__delattr__(name)
+        if name in LIFECYCLE_METHODS:
+            invalidate_lifecycle()
+
+
+def invalidate_lifecycle():
+    ComponentMetaclass.lifecycle_cache.clear()
+    ComponentMetaclass.generation += 1
+
+
+def lifecycle_calls(cls, method):
+    try:
+        return ComponentMetaclass.lifecycle_cache[cls, method]
+    except KeyError:
+        calls = tuple(
+            getattr(klass, method)
+            for klass in cls.mro()
+            if hasattr(klass, method)
+        )
+        ComponentMetaclass.lifecycle_cache[cls, method] = calls
+        return calls
+
+
+def bind_lifecycle(component, method):
+    return tuple(
+        functools.partial(call, component)
+        for call in lifecycle_calls(type(component), method)
+    )
+
+
+def call_or(calls):
+    # NOTE: all the calls are made, their results are or'ed together like
+    #       the peek() methods of a component always have been
+    result = False
+    for call in calls:
+        result |= call()
+    return result
+
+
+class Component(object, metaclass=ComponentMetaclass):
     logger = logging.getLogger(__name__)
     eq_operator = operator.eq
+    # NOTE: a retained component promises to be touched whenever its
+    #       drawing changes. When the application runs in retained mode,
+    #       render() draws into a cached layer of the size of the viewport
+    #       that is only redrawn when the component is touched, it is meant
+    #       for the few heavy components that rarely change.
+    retained = False
+    # NOTE: when the application runs in idle mode, the main loop blocks
+    #       until the next event or timer unless an active component is
+    #       animated and needs to be peeked at every frame
+    animated = False
+    # NOTE: keys of the resources used by the component, they are loaded and
+    #       kept in memory as long as the component is active
+    resource_keys = ()
+    # NOTE: when the application runs in display list mode, the drawings of
+    #       render() are recorded, sorted and replayed. A component that
+    #       draws with the renderer directly must not be recorded.
+    recorded = True
+    # NOTE: keys of its own state a component is redrawn for, None for all
+    #       of them. In reactive mode only the animated components are
+    #       peeked, the others are redrawn when a state they depend on
+    #       changes. The frame is still cleared and every component drawn
+    #       again unless the app is in retained or display list mode too,
+    #       where the unchanged components replay their layer or list.
+    depends = None
 
     def __init__(self, app, parent, **props):
         self.app = app
@@ -20,18 +98,42 @@ class Component(object):
         self.components = []
         self.event_handlers = {}
         self.state = {}
+        self._layer = None
+        self._dirty = True
+        self._display_list = None
+        # NOTE: links of the list of the active components of the app
+        self._linked = False
+        self._prev = None
+        self._next = None
+        self._depth = 0 if parent is None else parent._depth + 1
+        self._order = 0
+        self._dispatch = None
 
     @property
     def active(self):
         return self._active
 
     def set_state(self, state):
-        for k, v in state.items():
-            if (k not in self.state or
-                    not self.eq_operator(self.state[k], v)):
-                self.state.update(state)
-                self.app.touch()
-                return
+        changed = [
+            k for k, v in state.items()
+            if k not in self.state or not self.eq_operator(self.state[k], v)
+        ]
+        if changed:
+            self.state.update(state)
+            self.app.state_changed(self, changed)
+
+    def observe(self, component, keys, callback=None):
+        # NOTE: the component is redrawn when one of the keys of the state of
+        #       the other component changes, callback(component, keys) is
+        #       called with the keys that changed
+        self.app.observe(self, component, keys, callback)
+
+    def unobserve(self, component):
+        self.app.unobserve(self, component)
+
+    def touch(self):
+        self._dirty = True
+        self.app.touch()
 
     def init(self):
         pass
@@ -52,7 +154,10 @@ class Component(object):
         self.app.toggle_component(self)
 
     def register_event_handler(self, event_type, handler):
-        self.event_handlers.setdefault(event_type, []).append(handler)
+        handlers = self.event_handlers.setdefault(event_type, [])
+        handlers.append(handler)
+        if len(handlers) == 1:
+            self.app.subscribe_events(self, event_type)
 
     def add_component(self, component, **props):
         instance = self.app.load_component(component, self, props)
@@ -0,0 +1,136 @@
+class ActiveList(object):
+    # NOTE: the active components in draw order, parents before their
+    #       children, as a doubly linked list through the components. The
+    #       components of a subtree are contiguous and deeper than its root,
+    #       a subtree is spliced in or out without visiting the rest of the
+    #       tree.
+    #
+    #       Every linked component has an increasing order label, the lists
+    #       kept in draw order elsewhere are searched by label with bisect.
+    #       The labels are spaced so a subtree usually fits between its
+    #       neighbours, all of them are renumbered when it does not.
+    spacing = 1 << 32
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+        self.size = 0
+        self.animated = 0
+        self.relabels = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        node = self.head
+        while node is not None:
+            yield node
+            node = node._next
+
+    def snapshot(self):
+        return list(self)
+
+    def _linkable(self, component):
+        return component.active and (
+            component.parent is None or component.parent._linked)
+
+    def _subtree(self, component):
+        nodes = []
+        stack = [component]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(
+                child for child in reversed(node.components) if child.active)
+        return nodes
+
+    def _successor(self, component):
+        # NOTE: the first linked component after the subtree, it is the next
+        #       linked sibling of the component or of one of its ancestors
+        node = component
+        while node.parent is not None:
+            siblings = node.parent.components
+            for i in range(siblings.index(node) + 1, len(siblings)):
+                if siblings[i]._linked:
+                    return siblings[i]
+            node = node.parent
+        return None
+
+    def _label(self, nodes, previous, successor):
+        low = 0 if previous is None else previous._order
+        if successor is None:
+            high = low + self.spacing * (len(nodes) + 1)
+        else:
+            high = successor._order
+        step = (high - low) // (len(nodes) + 1)
+        if step == 0:
+            self._relabel()
+            return
+        for i, node in enumerate(nodes):
+            node._order = low + step * (i + 1)
+
+    def _relabel(self):
+        self.relabels += 1
+        order = 0
+        for node in self:
+            order += self.spacing
+            node._order = order
+
+    def insert(self, component):
+        if component._linked or not self._linkable(component):
+            return []
+        try:
+            successor = self._successor(component)
+        except ValueError:
+            # NOTE: the component is not a child of its parent, it is not
+            #       part of the tree
+            return []
+        nodes = self._subtree(component)
+        previous = self.tail if successor is None else successor._prev
+        first = previous
+        for node in nodes:
+            node._linked = True
+            node._prev = previous
+            if previous is None:
+                self.head = node
+            else:
+                previous._next = node
+            previous = node
+            if node.animated:
+                self.animated += 1
+        previous._next = successor
+        if successor is None:
+            self.tail = previous
+        else:
+            successor._prev = previous
+        self.size += len(nodes)
+        self._label(nodes, first, successor)
+        return nodes
+
+    def remove(self, component):
+        # NOTE: the labels of the removed components are left untouched so
+        #       they can still be found in the lists sorted by label
+        if not component._linked:
+            return []
+        nodes = [component]
+        node = component._next
+        while node is not None and node._depth > component._depth:
+            nodes.append(node)
+            node = node._next
+        before = component._prev
+        after = nodes[-1]._next
+        if before is None:
+            self.head = after
+        else:
+            before._next = after
+        if after is None:
+            self.tail = before
+        else:
+            after._prev = before
+        for node in nodes:
+            node._linked = False
+            node._prev = node._next = None
+            if node.animated:
+                self.animated -= 1
+        self.size -= len(nodes)
+        return nodes
@@ -1,4 +1,5 @@
 
+import bisect
 from collections import OrderedDict
 from contextlib import contextmanager
 import ctypes
@@ -10,30 +11,31 @@ except ImportError as ex:
     if not hasattr(sys, "_gen_docs"):
         sys.exit("SDL2 library not found: %s" % ex)
 
-from sdl2ui import Component
+from sdl2ui import Component, ComponentMetaclass
+from sdl2ui import bind_lifecycle, call_or, lifecycle_calls
+from sdl2ui.active import ActiveList
+from sdl2ui.batch import SpriteBatch
+from sdl2ui.cache import LRUCache
+from sdl2ui.capture import Recorder
+from sdl2ui.input import Input
+from sdl2ui.display import DisplayList, replay, sort_run
+from sdl2ui.loader import AsyncLoader, LoadBatch
+from sdl2ui.pacing import FramePacer
+from sdl2ui.profiler import Profiler
+from sdl2ui.resource import ResourceManager, mount, unmount
 from sdl2ui.resource import load as resource_loader
-
-
-def _get_active_components_recursively(component):
-    if not component.active:
-        return []
-    active_childs = []
-    for child in component.components:
-        active_childs.extend(_get_active_components_recursively(child))
-    return [component] + active_childs
+from sdl2ui.timer import TimerQueue
 
 
 def _deep_call(obj, method, args=(), kwargs={}):
-    for cls in type(obj).mro():
-        if hasattr(cls, method):
-            getattr(cls, method)(obj, *args, **kwargs)
+    for call in lifecycle_calls(type(obj), method):
+        call(obj, *args, **kwargs)
 
 
 def _deep_call_or(obj, method, args=(), kwargs={}):
     result = False
-    for cls in type(obj).mro():
-        if hasattr(cls, method):
-            result |= getattr(cls, method)(obj, *args, **kwargs)
+    for call in lifecycle_calls(type(obj), method):
+        result |= call(obj, *args, **kwargs)
     return result
 
 
@@ -49,19 +51,99 @@ class App(Component):
 
     def __init__(self, **options):
         Component.__init__(self, self, None, **options)
+        # NOTE: maps every event type to the active components that have
+        #       handlers for it, in draw order, and their order labels in
+        #       the active list to search them with bisect
+        self._event_index = {}
+        self._event_orders = {}
         self.viewport = sdl2.SDL_Rect()
         self._components_activation = OrderedDict()
-        self.resources = {}
+        self._active_list = ActiveList()
+        self._peek_calls = []
+        self._peek_orders = []
+        self._render_calls = []
+        self._render_orders = []
+        self._dispatch_generation = None
+        self._relabels = 0
+        self.resources = ResourceManager(
+            self, budget=self.props.get('resource_budget'),
+            budgets={'samples': self.props.get('sample_budget')})
+        self.bundles = [mount(x) for x in self.props.get('bundles', ())]
         self.tints = []
-        self.timers = []
+        self.timers = TimerQueue()
         self._running = True
+        self._touched = False
+        self._render_pending = False
+        self.retained = self.props.get('retained', False)
+        # NOTE: the layers by least recent use with their size in bytes, the
+        #       least recently used ones are released above the budget
+        self.layer_budget = self.props.get('layer_budget')
+        self._layers = LRUCache(self.layer_budget, self._destroy_layer)
+        self.display_list = self.props.get('display_list', False)
+        self._recording = None
+        self._rendering = False
+        # NOTE: bumped every time a texture drawn by a display list is
+        #       destroyed, the display lists recorded before can not be
+        #       replayed anymore
+        self._display_generation = 0
+        # NOTE: number of display lists of components by texture address
+        self._recorded_textures = {}
+        self._sorted_runs = {}
+        self._garbage = []
+        self.idle = self.props.get('idle', False)
+        # NOTE: in reactive mode the changes of states are applied once per
+        #       frame and only the animated components are peeked. A frame
+        #       with a change still renders every component, only retained
+        #       and display list modes spare the unchanged ones.
+        self.reactive = self.props.get('reactive', False)
+        self._changes = OrderedDict()
+        self._observers = {}
         self.logger.info("Initializing application: %s", self.name)
-        sdl2.SDL_Init(self.props.get('init_flags', 0))
+        init_flags = self.props.get('init_flags', 0)
+        if self.props.get('headless', False):
+            # NOTE: no display nor sound card needed, for benchmarks and tests.
+            #       The hints are cleared by SDL_Quit(), they do not outlive
+            #       the application unlike the environment variables.
+            for hint in (sdl2.SDL_HINT_VIDEODRIVER, sdl2.SDL_HINT_AUDIODRIVER):
+                sdl2.SDL_SetHintWithPriority(
+                    hint, b"dummy", sdl2.SDL_HINT_OVERRIDE)
+            init_flags |= sdl2.SDL_INIT_VIDEO
+        sdl2.SDL_Init(init_flags)
         self.register_event_handler(sdl2.SDL_QUIT, self._quit)
         self.register_event_handler(sdl2.SDL_WINDOWEVENT, self._window_event)
+        self.register_event_handler(
+            sdl2.SDL_RENDER_TARGETS_RESET, self._render_targets_reset)
         self.keys = sdl2.SDL_GetKeyboardState(None)
+        self.input = Input(self)
+        self.pacer = FramePacer(
+            self.props.get('fps', 60),
+            vsync=self.props.get('vsync', False),
+            spin=self.props.get('frame_spin', 0.002),
+            max_skip=self.props.get('max_frame_skip', 4))
+        # NOTE: with a frame target the frame is rendered at width x height
+        #       in a texture presented with an integer scale and letterboxes
+        self.frame_target = self.props.get('frame_target', False)
+        self._frame = None
+        self.frame_rect = sdl2.SDL_Rect()
+        self.frame_scale = 1
+        self._present_pending = False
         self.window = self._get_window()
         self.renderer = self._get_renderer()
+        if self.frame_target:
+            self._create_frame()
+        self.recorder = None
+        if self.props.get('record'):
+            self.start_recording(
+                self.props['record'], self.props.get('record_format', 'png'))
+        self.sprite_batch = SpriteBatch(self)
+        self.profiler = Profiler(
+            self, capacity=self.props.get('profile_capacity', 8192))
+        if self.props.get('profile', False):
+            self.profiler.enable()
+        self.loader = AsyncLoader(
+            self,
+            workers=self.props.get('loader_threads', 2),
+            budget=self.props.get('load_budget', 0.004))
         self.load_resource('font-6', 'font-6.png')
         self.resources['font-6'].make_font(
             "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!?("
@@ -92,32 +174,264 @@ class App(Component):
     def running(self):
         return self._running
 
+    @property
+    def recording(self):
+        return self._recording
+
+    def invalidate(self):
+        self._display_generation += 1
+        for component in self._active_list:
+            component._dirty = True
+        self.touch()
+
+    def state_changed(self, component, keys):
+        if self.reactive:
+            self._changes.setdefault(component, set()).update(keys)
+        else:
+            self._apply_changes(component, keys)
+            self.touch()
+
+    def observe(self, observer, component, keys, callback=None):
+        for key in keys:
+            observers = self._observers.setdefault((component, key), [])
+            if (observer, callback) not in observers:
+                observers.append((observer, callback))
+
+    def unobserve(self, observer, component):
+        for subscription in list(self._observers):
+            if subscription[0] is not component:
+                continue
+            observers = [
+                x for x in self._observers[subscription] if x[0] is not observer]
+            if observers:
+                self._observers[subscription] = observers
+            else:
+                del self._observers[subscription]
+
+    def _apply_changes(self, component, keys):
+        touched = False
+        if component.depends is None or not set(keys).isdisjoint(
+                component.depends):
+            component._dirty = True
+            touched = True
+        notifications = OrderedDict()
+        for key in keys:
+            for subscription in self._observers.get((component, key), ()):
+                notifications.setdefault(subscription, []).append(key)
+        for (observer, callback), observed in notifications.items():
+            observer._dirty = True
+            touched = True
+            if callback is not None:
+                callback(component, observed)
+        return touched
+
+    def _flush_changes(self):
+        if not self._changes:
+            return False
+        # NOTE: the changes made by the callbacks are for the next frame
+        changes = self._changes
+        self._changes = OrderedDict()
+        touched = False
+        for component, keys in changes.items():
+            touched |= self._apply_changes(component, keys)
+        return touched
+
     def _get_window(self):
+        width = self.props.get('width')
+        height = self.props.get('height')
+        if self.frame_target:
+            zoom = self.props.get('zoom', 1)
+            width, height = int(width * zoom), int(height * zoom)
         return sdl2.SDL_CreateWindow(
             self.name.encode(),
             sdl2.SDL_WINDOWPOS_CENTERED,
             sdl2.SDL_WINDOWPOS_CENTERED,
-            self.props.get('width'),
-            self.props.get('height'),
+            width,
+            height,
             self.props.get('window_flags', 0))
 
     def _get_renderer(self):
-        renderer = \
-            sdl2.SDL_CreateRenderer(self.window, -1, self.props.get('renderer_flags', 0))
+        flags = self.props.get('renderer_flags', 0)
+        if self.props.get('vsync', False):
+            flags |= sdl2.SDL_RENDERER_PRESENTVSYNC
+        if self.props.get('headless', False):
+            flags |= sdl2.SDL_RENDERER_SOFTWARE
+        renderer = sdl2.SDL_CreateRenderer(self.window, -1, flags)
         zoom = self.props.get('zoom', 1)
-        if zoom is not 1:
+        if zoom != 1 and not self.frame_target:
             sdl2.SDL_RenderSetScale(renderer, zoom, zoom)
         sdl2.SDL_RenderGetViewport(renderer, self.viewport)
         self.logger.debug("Viewport: %dx%d", self.viewport.w, self.viewport.h)
         return renderer
 
+    def _create_frame(self):
+        width = self.props.get('width')
+        height = self.props.get('height')
+        texture = self.create_target_texture(width, height)
+        if texture is None:
+            self.logger.warning(
+                "Can not render to a frame target, scaling every drawing")
+            self.frame_target = False
+            zoom = self.props.get('zoom', 1)
+            sdl2.SDL_RenderSetScale(self.renderer, zoom, zoom)
+            sdl2.SDL_RenderGetViewport(self.renderer, self.viewport)
+            return
+        sdl2.SDL_SetTextureBlendMode(texture, sdl2.SDL_BLENDMODE_NONE)
+        # NOTE: no filtering seams, the pixels are only ever duplicated
+        sdl2.SDL_SetTextureScaleMode(texture, sdl2.SDL_ScaleModeNearest)
+        self._frame = texture
+        sdl2.SDL_SetRenderTarget(self.renderer, texture)
+        self.viewport.x = self.viewport.y = 0
+        self.viewport.w, self.viewport.h = width, height
+        self._update_frame_rect()
+
+    def _update_frame_rect(self):
+        # NOTE: the output size is the size of the render target if any
+        w = ctypes.c_int()
+        h = ctypes.c_int()
+        target = sdl2.SDL_GetRenderTarget(self.renderer)
+        sdl2.SDL_SetRenderTarget(self.renderer, None)
+        sdl2.SDL_GetRendererOutputSize(
+            self.renderer, ctypes.byref(w), ctypes.byref(h))
+        sdl2.SDL_SetRenderTarget(self.renderer, target)
+        self.frame_scale = max(1, min(
+            w.value // self.viewport.w, h.value // self.viewport.h))
+        self.frame_rect.w = self.viewport.w * self.frame_scale
+        self.frame_rect.h = self.viewport.h * self.frame_scale
+        self.frame_rect.x = (w.value - self.frame_rect.w) // 2
+        self.frame_rect.y = (h.value - self.frame_rect.h) // 2
+
+    def to_logical(self, x, y):
+        # NOTE: converts window coordinates, like the ones of the mouse
+        #       events, to the coordinates of the frame
+        if self._frame is None:
+            return x, y
+        return (
+            (x - self.frame_rect.x) // self.frame_scale,
+            (y - self.frame_rect.y) // self.frame_scale)
+
+    def _present(self):
+        self._present_pending = False
+        if self._frame is None:
+            sdl2.SDL_RenderPresent(self.renderer)
+            return
+        # NOTE: the frame is copied once, the letterboxes are cleared
+        color = [sdl2.Uint8() for _ in range(4)]
+        sdl2.SDL_GetRenderDrawColor(
+            self.renderer, *[ctypes.byref(x) for x in color])
+        sdl2.SDL_SetRenderTarget(self.renderer, None)
+        sdl2.SDL_SetRenderDrawColor(self.renderer, 0, 0, 0, 0xff)
+        sdl2.SDL_RenderClear(self.renderer)
+        sdl2.SDL_RenderCopy(self.renderer, self._frame, None, self.frame_rect)
+        sdl2.SDL_RenderPresent(self.renderer)
+        sdl2.SDL_SetRenderTarget(self.renderer, self._frame)
+        sdl2.SDL_SetRenderDrawColor(self.renderer, *[x.value for x in color])
+
+    def create_target_texture(self, w, h):
+        if not sdl2.SDL_RenderTargetSupported(self.renderer):
+            return None
+        texture = sdl2.SDL_CreateTexture(
+            self.renderer, sdl2.SDL_PIXELFORMAT_ARGB8888,
+            sdl2.SDL_TEXTUREACCESS_TARGET, w, h)
+        if not texture:
+            self.logger.warning(
+                "Can not create target texture %dx%d: %s",
+                w, h, sdl2.SDL_GetError().decode())
+            return None
+        sdl2.SDL_SetTextureBlendMode(texture, sdl2.SDL_BLENDMODE_BLEND)
+        return texture
+
+    @contextmanager
+    def render_target(self, texture):
+        previous = sdl2.SDL_GetRenderTarget(self.renderer)
+        color = [sdl2.Uint8() for _ in range(4)]
+        sdl2.SDL_GetRenderDrawColor(
+            self.renderer, *[ctypes.byref(x) for x in color])
+        recording = self._recording
+        sdl2.SDL_SetRenderTarget(self.renderer, texture)
+        sdl2.SDL_SetRenderDrawColor(self.renderer, 0, 0, 0, 0)
+        sdl2.SDL_RenderClear(self.renderer)
+        sdl2.SDL_SetRenderDrawColor(self.renderer, *[x.value for x in color])
+        # NOTE: the drawings on the texture are not recorded
+        self._recording = None
+        try:
+            yield
+        finally:
+            self._recording = recording
+            sdl2.SDL_SetRenderTarget(self.renderer, previous)
+
+    def copy(self, texture, src, dest, tint=None):
+        if self._recording is None:
+            sdl2.SDL_RenderCopy(self.renderer, texture, src, dest)
+        else:
+            self._recording.copy(texture, tint, src, dest)
+
+    def destroy_texture(self, texture):
+        self._display_generation += 1
+        self._discard_texture(texture)
+
+    def destroy_cached_texture(self, texture):
+        # NOTE: a texture owned by a cache is only drawn through copy(), the
+        #       display lists are invalidated only when one of them draws it
+        address = ctypes.cast(texture, ctypes.c_void_p).value
+        if address in self._recorded_textures or (
+                self._recording is not None and
+                address in self._recording.textures):
+            self._display_generation += 1
+        self._discard_texture(texture)
+
+    def _discard_texture(self, texture):
+        if self._rendering:
+            # NOTE: the texture may still be in a display list of this frame
+            self._garbage.append(texture)
+        else:
+            sdl2.SDL_DestroyTexture(texture)
+
     def _destroy_resources(self):
-        for k in list(self.resources.keys()):
-            self.resources[k].close()
+        self.resources.close()
+
+    def _set_display_list(self, component, display_list):
+        # NOTE: counts the display lists of the components drawing every
+        #       texture
+        recorded = self._recorded_textures
+        if component._display_list is not None:
+            for address in component._display_list.textures:
+                recorded[address] -= 1
+                if not recorded[address]:
+                    del recorded[address]
+        if display_list is not None:
+            for address in display_list.textures:
+                recorded[address] = recorded.get(address, 0) + 1
+        component._display_list = display_list
+
+    @property
+    def layers_size(self):
+        return self._layers.size
+
+    def _release_layer(self, component):
+        self._set_display_list(component, None)
+        self._layers.discard(component)
+
+    def _destroy_layer(self, component, layer):
+        self.logger.debug("Releasing layer of %r", component)
+        component._layer = None
+        sdl2.SDL_DestroyTexture(layer)
+
+    def _release_layers(self):
+        for component in self._active_list:
+            self._release_layer(component)
 
     def _clean_up(self):
         self.logger.info("Destroying application: %s", self.name)
+        self._release_layers()
+        self.stop_recording()
+        self.loader.shutdown()
         self._destroy_resources()
+        for bundle in self.bundles:
+            unmount(bundle)
+        if self._frame is not None:
+            sdl2.SDL_DestroyTexture(self._frame)
+            self._frame = None
         if self.renderer:
             sdl2.SDL_DestroyRenderer(self.renderer)
         if self.window:
@@ -133,26 +447,107 @@ class App(Component):
         self.poll_safe(event)
 
     def _window_event(self, event):
+        if self._frame is not None:
+            # NOTE: the frame does not depend on the size of the window, it
+            #       only needs to be presented again
+            if event.window.event == sdl2.SDL_WINDOWEVENT_SIZE_CHANGED:
+                self._update_frame_rect()
+            self._present_pending = True
+            return
+        if event.window.event == sdl2.SDL_WINDOWEVENT_SIZE_CHANGED:
+            sdl2.SDL_RenderGetViewport(self.renderer, self.viewport)
+            self._release_layers()
+        self.touch()
+
+    def _render_targets_reset(self, event):
+        # NOTE: the content of all the target textures has been lost
+        for component in self._active_list:
+            component._dirty = True
         self.touch()
 
     def _quit(self, event):
         self._running = False
 
+    def poll(self, event):
+        for component in self._event_index.get(event.type, ()):
+            for event_handler in component.event_handlers[event.type]:
+                event_handler(event)
+
+    def poll_safe(self, event):
+        for component in self._event_index.get(event.type, ()):
+            for event_handler in component.event_handlers[event.type]:
+                try:
+                    event_handler(event)
+                except:
+                    self.logger.exception(
+                        "Error during execution of event handler: %r",
+                        event_handler)
+
+    def subscribe_events(self, component, event_type):
+        if not component._linked:
+            # NOTE: the component will be indexed when it gets active
+            return
+        self._subscribe(component, event_type)
+
+    def _subscribe(self, component, event_type):
+        # NOTE: a handler can be registered while the event is dispatched,
+        #       the list is copied instead of changed under the loop
+        subscribers = self._event_index.get(event_type, [])
+        orders = self._event_orders.get(event_type, [])
+        i = bisect.bisect(orders, component._order)
+        self._event_index[event_type] = \
+            subscribers[:i] + [component] + subscribers[i:]
+        self._event_orders[event_type] = \
+            orders[:i] + [component._order] + orders[i:]
+
+    def _update_event_index(self, inserted, removed):
+        # NOTE: only the event types of the components spliced in or out of
+        #       the active list are updated, the subscribers are sorted by
+        #       the order labels of the active list
+        for component in removed:
+            for event_type in component.event_handlers:
+                subscribers = self._event_index.get(event_type, [])
+                orders = self._event_orders.get(event_type, [])
+                i = bisect.bisect_left(orders, component._order)
+                if i < len(subscribers) and subscribers[i] is component:
+                    del subscribers[i]
+                    del orders[i]
+        for component in inserted:
+            for event_type in component.event_handlers:
+                orders = self._event_orders.setdefault(event_type, [])
+                i = bisect.bisect(orders, component._order)
+                self._event_index.setdefault(event_type, []).insert(
+                    i, component)
+                orders.insert(i, component._order)
+
     def _poll_events(self):
         event = sdl2.SDL_Event()
         while sdl2.SDL_PollEvent(ctypes.byref(event)) != 0:
             self.poll(event)
 
+    def _can_idle(self):
+        if (not self._running or self._render_pending or self._touched or
+                self._present_pending or self._changes or
+                self._components_activation or self.loader.busy):
+            return False
+        return not self._active_list.animated
+
+    def _wait_events(self):
+        event = sdl2.SDL_Event()
+        deadline = self.timers.next_deadline()
+        if deadline is None:
+            received = sdl2.SDL_WaitEvent(ctypes.byref(event))
+        else:
+            timeout = deadline - sdl2.timer.SDL_GetTicks()
+            if timeout <= 0:
+                return
+            received = sdl2.SDL_WaitEventTimeout(
+                ctypes.byref(event), timeout)
+        if received:
+            self.poll(event)
+
     def _call_timers(self, ticks):
-        if self.timers:
-            i = 0
-            for time, callback in self.timers:
-                if time > ticks:
-                    break
-                i += 1
-                callback()
-            if i > 0:
-                self.timers = self.timers[i:]
+        self.timers.call(ticks)
 
     def load_component(self, component, parent, props):
         assert issubclass(component, Component), \
@@ -163,7 +558,7 @@ class App(Component):
 
     @property
     def active_components(self):
-        return self._active_components
+        return self._active_list.snapshot()
 
     def _update_active_components(self):
         if not self._components_activation:
@@ -176,30 +571,202 @@ class App(Component):
                 has_changed = True
                 component._active = active
                 if active:
+                    self._spliced(self._active_list.insert(component), ())
+                    component._dirty = True
+                    for key in component.resource_keys:
+                        self.resources.acquire(key, component)
                     _deep_call(component, 'activate')
                     self.logger.debug("Component has been activated: %r",
                         component)
                 else:
+                    self._spliced((), self._active_list.remove(component))
+                    self._release_layer(component)
                     _deep_call(component, 'deactivate')
+                    for key in component.resource_keys:
+                        self.resources.release(key, component)
                     self.logger.debug("Component has been deactivated: %r",
                         component)
         if has_changed:
-            self._active_components = _get_active_components_recursively(self)
             self.touch()
 
+    def _spliced(self, inserted, removed):
+        if self._relabels != self._active_list.relabels:
+            self._update_orders()
+        self._update_event_index(inserted, removed)
+        if self._dispatch_generation != ComponentMetaclass.generation:
+            # NOTE: the dispatch is rebuilt entirely before it is used
+            return
+        # NOTE: a subtree is contiguous in draw order, its calls are a slice
+        #       of the dispatch lists found by its first and last labels
+        dispatch = (
+            (self._peek_calls, self._peek_orders),
+            (self._render_calls, self._render_orders))
+        if removed:
+            for calls, orders in dispatch:
+                start = bisect.bisect_left(orders, removed[0]._order)
+                end = bisect.bisect_right(orders, removed[-1]._order)
+                del calls[start:end]
+                del orders[start:end]
+        if inserted:
+            peek_calls = []
+            render_calls = []
+            for component in inserted:
+                self._add_dispatch(component, peek_calls, render_calls)
+            for (calls, orders), added in zip(
+                    dispatch, (peek_calls, render_calls)):
+                i = bisect.bisect_left(orders, inserted[0]._order)
+                calls[i:i] = added
+                orders[i:i] = [x._order for x, _ in added]
+
+    def _update_orders(self):
+        # NOTE: the active list renumbered all its labels
+        self._relabels = self._active_list.relabels
+        for event_type, subscribers in self._event_index.items():
+            self._event_orders[event_type] = [x._order for x in subscribers]
+        self._peek_orders = [x._order for x, _ in self._peek_calls]
+        self._render_orders = [x._order for x, _ in self._render_calls]
+
+    def _add_dispatch(self, component, peek_calls, render_calls):
+        profiler = self.profiler if self.profiler.enabled else None
+        key = (ComponentMetaclass.generation, profiler is not None)
+        if component._dispatch is None or component._dispatch[0] != key:
+            peeks = bind_lifecycle(component, 'peek')
+            renders = bind_lifecycle(component, 'render')
+            if profiler is not None:
+                peeks = profiler.wrap_lifecycle(component, 'peek', peeks)
+                renders = profiler.wrap_lifecycle(
+                    component, 'render', renders)
+            component._dispatch = (key, peeks, renders)
+        _, peeks, renders = component._dispatch
+        if peeks and (component.animated or not self.reactive):
+            peek_calls.append((component, peeks))
+        if renders:
+            render_calls.append((component, renders))
+
+    def _update_dispatch(self):
+        # NOTE: the bound lifecycle methods of the active components are
+        #       prepared once here so the main loop only iterates flat lists
+        #       and the components keep theirs as long as they are valid. The
+        #       lists are patched when a subtree is activated or deactivated.
+        self._dispatch_generation = ComponentMetaclass.generation
+        self._peek_calls = []
+        self._render_calls = []
+        for component in self._active_list:
+            self._add_dispatch(
+                component, self._peek_calls, self._render_calls)
+        self._peek_orders = [x._order for x, _ in self._peek_calls]
+        self._render_orders = [x._order for x, _ in self._render_calls]
+
     def _peek_components(self):
-        # NOTE: any() used on a generator returns as soon as it finds a True
-        #       operand. Here, we need all the peek() methods to be called.
-        return any([
-            _deep_call_or(component, 'peek')
-            for component in self._active_components
-        ])
+        if self._dispatch_generation != ComponentMetaclass.generation:
+            self._update_dispatch()
+        # NOTE: all the peek() methods need to be called even if one of them
+        #       already returned True
+        result = False
+        if self.reactive:
+            result = self._flush_changes()
+            if self._touched:
+                self._touched = False
+                result = True
+        for component, peeks in self._peek_calls:
+            if call_or(peeks):
+                component._dirty = True
+                result = True
+        return result
 
     def _render_components(self):
+        if self._dispatch_generation != ComponentMetaclass.generation:
+            self._update_dispatch()
         sdl2.SDL_RenderClear(self.renderer)
-        for component in self._active_components:
-            _deep_call(component, 'render')
-        sdl2.SDL_RenderPresent(self.renderer)
+        self._rendering = True
+        try:
+            run = []
+            sorted_runs = {}
+            for component, renders in self._render_calls:
+                if self.retained and component.retained:
+                    self._replay_run(run, sorted_runs)
+                    self._render_layer(component, renders)
+                elif self.display_list and component.recorded:
+                    run.append(self._record(component, renders))
+                else:
+                    self._replay_run(run, sorted_runs)
+                    for render in renders:
+                        render()
+            self._replay_run(run, sorted_runs)
+            self._sorted_runs = sorted_runs
+        finally:
+            self._recording = None
+            self._rendering = False
+            for texture in self._garbage:
+                sdl2.SDL_DestroyTexture(texture)
+            del self._garbage[:]
+        if self.recorder is not None:
+            self.recorder.capture()
+        self._present()
+
+    def _record(self, component, renders):
+        display_list = component._display_list
+        if (display_list is None or component._dirty or
+                not component.retained or
+                display_list.generation != self._display_generation):
+            # NOTE: the previous display list is replaced, the texts it draws
+            #       can be evicted while the new one is recorded
+            self._set_display_list(component, None)
+            display_list = DisplayList(self._display_generation)
+            self._recording = display_list
+            try:
+                for render in renders:
+                    render()
+            finally:
+                self._recording = None
+            self._set_display_list(component, display_list)
+            component._dirty = False
+        return display_list
+
+    def _replay_run(self, run, sorted_runs):
+        # NOTE: the display lists of consecutive recorded components are
+        #       sorted together, the result is kept as long as none of them
+        #       is recorded again
+        if not run:
+            return
+        key = tuple(run)
+        commands = self._sorted_runs.get(key)
+        if commands is None:
+            commands = sort_run(run)
+        sorted_runs[key] = commands
+        replay(self.renderer, commands)
+        del run[:]
+
+    def _create_layer(self, component):
+        size = self.viewport.w * self.viewport.h * 4
+        if not self._layers.reserve(size):
+            return None
+        layer = self.create_target_texture(self.viewport.w, self.viewport.h)
+        if layer is None and len(self._layers):
+            # NOTE: out of video memory, the other layers are released
+            self._layers.clear()
+            layer = self.create_target_texture(
+                self.viewport.w, self.viewport.h)
+        if layer is not None:
+            self._layers.put(component, layer, size)
+        return layer
+
+    def _render_layer(self, component, renders):
+        if component._layer is None:
+            component._layer = self._create_layer(component)
+            if component._layer is None:
+                for render in renders:
+                    render()
+                return
+            component._dirty = True
+        else:
+            self._layers.get(component)
+        if component._dirty:
+            with self.render_target(component._layer):
+                for render in renders:
+                    render()
+            component._dirty = False
+        sdl2.SDL_RenderCopy(self.renderer, component._layer, None, None)
 
     def enable_component(self, component):
         self._components_activation[component] = True
@@ -211,28 +778,82 @@ class App(Component):
         self._components_activation[component] = not component.active
 
     def loop(self):
-        dt = int(1000 / self.props.get('fps', 60))
+        self.pacer.reset()
         try:
+            profiler = self.profiler
             while self._running:
                 t1 = sdl2.timer.SDL_GetTicks()
+                profiler.begin_frame()
                 self._update_active_components()
+                profiler.mark('update')
                 self._poll_events()
+                self.input.update()
+                profiler.mark('events')
                 self._call_timers(t1)
+                profiler.mark('timers')
+                self.loader.process()
+                profiler.mark('loader')
                 if self._peek_components():
+                    self._render_pending = True
+                profiler.mark('peek')
+                presented = False
+                if self._render_pending and not self.pacer.skip_render():
                     self._render_components()
-                t2 = sdl2.timer.SDL_GetTicks()
-                delay = dt - (t2 - t1)
-                if delay > 0:
-                    sdl2.timer.SDL_Delay(delay)
+                    self._render_pending = False
+                    presented = True
+                elif self._present_pending:
+                    self._present()
+                    presented = True
+                profiler.mark('render')
+                self.pacer.wait(presented)
+                profiler.mark('wait')
+                if self.idle and self._can_idle():
+                    self._wait_events()
+                    self.pacer.reset()
+                profiler.mark('idle')
+                profiler.end_frame()
         except BaseException as exception:
             self.quit(exception)
             raise
         finally:
             self._clean_up()
 
-    def load_resource(self, key, filename):
+    def start_recording(self, path, format='png', buffers=4, level=1):
+        # NOTE: every frame rendered from now on is written by a background
+        #       thread, see Recorder
+        self.stop_recording()
+        self.recorder = Recorder(self, path, format, buffers, level)
+        return self.recorder
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.stop()
+        return recorder
+
+    def load_resource(self, key, filename, lazy=False, hint=None):
+        # NOTE: hint chooses the type of resource, e.g. 'music' or 'sample'
+        if lazy:
+            self.resources.register(key, filename, hint)
+            return
         self.logger.info("Loading %r: %s", key, filename)
-        self.resources[key] = resource_loader(self, filename)
+        self.resources[key] = resource_loader(self, filename, hint=hint)
+
+    def load_resource_async(self, key, filename, placeholder=None,
+                            progress=None, hint=None):
+        return self.load_resources_async(
+            [(key, filename, hint)], placeholder, progress)[0]
+
+    def load_resources_async(self, resources, placeholder=None,
+                             progress=None):
+        # NOTE: resources are (key, filename) or (key, filename, hint)
+        batch = LoadBatch(len(resources), progress)
+        return [
+            self.loader.load(
+                entry[0], entry[1], placeholder, batch,
+                entry[2] if len(entry) > 2 else None)
+            for entry in resources
+        ]
 
     @contextmanager
     def tint(self, tint):
@@ -256,6 +877,13 @@ class App(Component):
     def write(self, resource_key, *args, **kwargs):
         return self._call_resource(resource_key, 'write', *args, **kwargs)
 
-    def add_timer(self, interval, callback):
+    def draw_batch(self, resource_key, *args, **kwargs):
+        return self._call_resource(
+            resource_key, 'draw_batch', *args, **kwargs)
+
+    def frame_stats(self):
+        return self.pacer.stats()
+
+    def add_timer(self, interval, callback, repeat=False):
         ticks = sdl2.timer.SDL_GetTicks() + interval
-        self.timers.append((ticks, callback))
+        return self.timers.add(ticks, callback, interval if repeat else None)
@@ -0,0 +1,272 @@
+import ctypes
+import json
+import logging
+import os
+import sdl2
+
+from sdl2ui.resource import Image, find
+
+
+logger = logging.getLogger(__name__)
+
+
+class SkylinePacker(object):
+    # NOTE: bottom-left skyline bin packing, the skyline is a list of
+    #       (x, y, width) segments covering the whole width of the bin
+    def __init__(self, width, height, padding=1):
+        self.width = width
+        self.height = height
+        self.padding = padding
+        self.skyline = [(0, 0, width)]
+        self.used_w = 0
+        self.used_h = 0
+
+    def _fit(self, i, w, h):
+        x = self.skyline[i][0]
+        if x + w > self.width:
+            return None
+        y = 0
+        remaining = w
+        while remaining > 0:
+            y = max(y, self.skyline[i][1])
+            if y + h > self.height:
+                return None
+            remaining -= self.skyline[i][2]
+            i += 1
+        return y
+
+    def insert(self, w, h):
+        if w > self.width or h > self.height:
+            return None
+        pw = min(w + self.padding, self.width)
+        ph = min(h + self.padding, self.height)
+        best = None
+        for i in range(len(self.skyline)):
+            y = self._fit(i, pw, ph)
+            if y is None:
+                continue
+            score = (y + ph, self.skyline[i][0])
+            if best is None or score < best[0]:
+                best = (score, i, self.skyline[i][0], y)
+        if best is None:
+            return None
+        _, i, x, y = best
+        self._add_level(i, x, y, pw, ph)
+        self.used_w = max(self.used_w, x + w)
+        self.used_h = max(self.used_h, y + h)
+        return x, y
+
+    def _add_level(self, i, x, y, w, h):
+        skyline = self.skyline
+        skyline.insert(i, (x, y + h, w))
+        j = i + 1
+        while j < len(skyline):
+            px, _, pw = skyline[j - 1]
+            sx, sy, sw = skyline[j]
+            if sx >= px + pw:
+                break
+            shrink = px + pw - sx
+            if sw <= shrink:
+                del skyline[j]
+            else:
+                skyline[j] = (sx + shrink, sy, sw - shrink)
+                break
+        j = 0
+        while j < len(skyline) - 1:
+            if skyline[j][1] == skyline[j + 1][1]:
+                skyline[j] = (
+                    skyline[j][0], skyline[j][1],
+                    skyline[j][2] + skyline[j + 1][2])
+                del skyline[j + 1]
+            else:
+                j += 1
+
+
+class AtlasPage(object):
+    def __init__(self, app, texture):
+        self.app = app
+        self.texture = texture
+        self.references = 0
+
+    def acquire(self):
+        self.references += 1
+
+    def release(self):
+        self.references -= 1
+        if self.references <= 0:
+            self.destroy()
+
+    def destroy(self):
+        # NOTE: the page may still be drawn by a display list or a layer, it
+        #       is destroyed by the app like the texture of an Image
+        if self.texture:
+            self.app.destroy_texture(self.texture)
+            self.texture = None
+
+
+class AtlasImage(Image):
+    regex = None
+    evictable = False
+
+    def __init__(self, app, filename, page, src):
+        self.app = app
+        self.filename = filename
+        self.filepath = None
+        self.page = page
+        page.acquire()
+        self._set_texture(page.texture, src)
+
+    def load(self):
+        pass
+
+    def close(self):
+        if getattr(self, 'text_cache', None):
+            self.text_cache.clear()
+        if self.page is not None:
+            self.page.release()
+            self.page = None
+            self.texture = None
+
+
+class Atlas(object):
+    def __init__(self, pages, entries):
+        self.pages = pages
+        self.entries = entries
+
+    def register(self, app):
+        for key, image in self.entries.items():
+            app.resources[key] = image
+
+
+def _max_texture_size(app, size):
+    info = sdl2.SDL_RendererInfo()
+    if sdl2.SDL_GetRendererInfo(app.renderer, ctypes.byref(info)) == 0:
+        limits = [
+            x for x in (info.max_texture_width, info.max_texture_height) if x]
+        if limits:
+            return min([size] + limits)
+    return size
+
+
+def _create_texture(app, surface):
+    texture = sdl2.SDL_CreateTextureFromSurface(app.renderer, surface)
+    if not texture:
+        raise ValueError(
+            "can't create atlas page of %dx%d: %s"
+            % (surface.contents.w, surface.contents.h,
+               sdl2.SDL_GetError().decode()))
+    return texture
+
+
+def _destroy_pages(pages):
+    for page in pages:
+        page.destroy()
+
+
+def build_atlas(app, resources, size=1024, padding=1, save=None):
+    # NOTE: resources is a list of (key, filename). When save is a path
+    #       without extension, the pages are saved in PNG next to a JSON
+    #       index that can be loaded back with load_atlas().
+    size = _max_texture_size(app, size)
+    surfaces = []
+    try:
+        for key, filename in resources:
+            image = Image(app, filename, lazy=True)
+            surfaces.append((key, filename, image.decode()))
+        surfaces.sort(
+            key=lambda x: (x[2].contents.h, x[2].contents.w), reverse=True)
+        packers = []
+        placements = []
+        for key, filename, surface in surfaces:
+            w, h = surface.contents.w, surface.contents.h
+            if w > size or h > size:
+                raise ValueError(
+                    "image %r (%dx%d) does not fit in an atlas of %dx%d"
+                    % (filename, w, h, size, size))
+            for page, packer in enumerate(packers):
+                position = packer.insert(w, h)
+                if position is not None:
+                    break
+            else:
+                page = len(packers)
+                packers.append(SkylinePacker(size, size, padding))
+                position = packers[page].insert(w, h)
+            placements.append((key, filename, surface, page, position))
+        pages = []
+        page_filenames = []
+        for page, packer in enumerate(packers):
+            target = sdl2.SDL_CreateRGBSurfaceWithFormat(
+                0, packer.used_w, packer.used_h, 32,
+                sdl2.SDL_PIXELFORMAT_RGBA32)
+            if not target:
+                _destroy_pages(pages)
+                raise ValueError(
+                    "can't create atlas surface: %s"
+                    % sdl2.SDL_GetError().decode())
+            try:
+                for key, filename, surface, p, (x, y) in placements:
+                    if p != page:
+                        continue
+                    sdl2.SDL_SetSurfaceBlendMode(
+                        surface, sdl2.SDL_BLENDMODE_NONE)
+                    sdl2.SDL_BlitSurface(
+                        surface, None, target, sdl2.SDL_Rect(
+                            x, y, surface.contents.w, surface.contents.h))
+                if save is not None:
+                    page_filenames.append(
+                        _save_page(target, "%s-%d.png" % (save, page)))
+                pages.append(AtlasPage(app, _create_texture(app, target)))
+            except Exception:
+                _destroy_pages(pages)
+                raise
+            finally:
+                sdl2.SDL_FreeSurface(target)
+        index = {}
+        entries = {}
+        for key, filename, surface, page, (x, y) in placements:
+            w, h = surface.contents.w, surface.contents.h
+            index[key] = [filename, page, x, y, w, h]
+            entries[key] = AtlasImage(
+                app, filename, pages[page], sdl2.SDL_Rect(x, y, w, h))
+    finally:
+        for _, _, surface in surfaces:
+            sdl2.SDL_FreeSurface(surface)
+    if save is not None:
+        with open(save + '.json', 'w') as fileobj:
+            json.dump({'pages': page_filenames, 'entries': index}, fileobj)
+    logger.info(
+        "Atlas built: %d images in %d page(s)", len(entries), len(pages))
+    atlas = Atlas(pages, entries)
+    atlas.register(app)
+    return atlas
+
+
+def _save_page(surface, filepath):
+    from sdl2 import sdlimage
+    if sdlimage.IMG_SavePNG(surface, filepath.encode()) != 0:
+        raise ValueError(
+            "can't save atlas page %r: %s"
+            % (filepath, sdlimage.IMG_GetError().decode()))
+    return os.path.basename(filepath)
+
+
+def load_atlas(app, filename):
+    with open(find(filename)) as fileobj:
+        index = json.load(fileobj)
+    directory = os.path.dirname(filename)
+    pages = []
+    for page_filename in index['pages']:
+        page = Image(app, os.path.join(directory, page_filename))
+        if not page.texture:
+            _destroy_pages(pages)
+            raise ValueError(
+                "can't create atlas page %r: %s"
+                % (page_filename, sdl2.SDL_GetError().decode()))
+        pages.append(AtlasPage(app, page.texture))
+    entries = {}
+    for key, (image_filename, page, x, y, w, h) in index['entries'].items():
+        entries[key] = AtlasImage(
+            app, image_filename, pages[page], sdl2.SDL_Rect(x, y, w, h))
+    atlas = Atlas(pages, entries)
+    atlas.register(app)
+    return atlas
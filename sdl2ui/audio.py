@@ -1,15 +1,97 @@
+import ctypes
 import itertools
 import logging
+import sys
+import threading
 import sdl2
 
 import sdl2ui
 
 
+# NOTE: (memoryview format, numpy dtype) of the samples of every SDL format
+SAMPLE_TYPES = {
+    sdl2.AUDIO_U8: ('B', 'u1'),
+    sdl2.AUDIO_S8: ('b', 'i1'),
+    sdl2.AUDIO_U16LSB: ('H', '<u2'),
+    sdl2.AUDIO_S16LSB: ('h', '<i2'),
+    sdl2.AUDIO_U16MSB: ('H', '>u2'),
+    sdl2.AUDIO_S16MSB: ('h', '>i2'),
+    sdl2.AUDIO_S32LSB: ('i', '<i4'),
+    sdl2.AUDIO_S32MSB: ('i', '>i4'),
+    sdl2.AUDIO_F32LSB: ('f', '<f4'),
+    sdl2.AUDIO_F32MSB: ('f', '>f4'),
+}
+
+
+class RingBuffer(object):
+    # NOTE: single producer, single consumer. The positions only grow and
+    #       each side only moves its own so no lock is needed to copy data.
+    def __init__(self, size):
+        self.size = size
+        self.data = (sdl2.Uint8 * size)()
+        self.address = ctypes.addressof(self.data)
+        self.drained = threading.Event()
+        self._read = 0
+        self._write = 0
+
+    @property
+    def fill_level(self):
+        return self._write - self._read
+
+    @property
+    def free(self):
+        return self.size - self.fill_level
+
+    def _segments(self, position, length):
+        start = position % self.size
+        first = min(length, self.size - start)
+        yield self.address + start, 0, first
+        if first < length:
+            yield self.address, first, length - first
+
+    def write(self, address, length, copy=ctypes.memmove):
+        length = min(length, self.free)
+        for ring_address, offset, size in self._segments(self._write, length):
+            copy(ring_address, address + offset, size)
+        self._write += length
+        return length
+
+    def read(self, address, length, copy=ctypes.memmove):
+        length = min(length, self.fill_level)
+        for ring_address, offset, size in self._segments(self._read, length):
+            copy(address + offset, ring_address, size)
+        self._read += length
+        self.drained.set()
+        return length
+
+    def clear(self):
+        self._read = self._write
+        self.drained.set()
+
+
 class AudioDevice(sdl2ui.Component):
     logger = logging.getLogger(__name__)
+    # NOTE: type of the buffer given to fill(): 'memoryview' or 'numpy'
+    sample_view = 'memoryview'
+    paused = True
 
     def init(self):
-        self.c_callback = sdl2.SDL_AudioCallback(self._audio_callback)
+        # NOTE: 'ring' produces the audio ahead of time in a thread and the
+        #       SDL callback only copies out of a ring buffer, 'queue' pushes
+        #       it from the thread with SDL_QueueAudio
+        self.producer = self.props.get('producer')
+        self.underruns = 0
+        self._ring = None
+        self._producer_thread = None
+        if self.producer == 'queue':
+            # NOTE: a NULL callback makes SDL read from its audio queue
+            self.c_callback = sdl2.SDL_AudioCallback()
+        elif self.producer == 'ring':
+            self.c_callback = sdl2.SDL_AudioCallback(self._ring_callback)
+        elif type(self).fill is AudioDevice.fill:
+            self.c_callback = sdl2.SDL_AudioCallback(self._audio_callback)
+        else:
+            self.c_callback = sdl2.SDL_AudioCallback(self._fill_callback)
         want = sdl2.SDL_AudioSpec(
             self.props['frequency'], self.props['format'],
             self.props['channels'], self.props['chunksize'], self.c_callback)
@@ -24,19 +106,190 @@ class AudioDevice(sdl2ui.Component):
             raise ValueError(
                 "can't open audio device: %s" % sdl2.SDL_GetError().decode())
         self.app.register_event_handler(sdl2.SDL_QUIT, self.quit)
+        self._scratch = (sdl2.Uint8 * self.audio_spec.size)()
+        self._scratch_view = self._make_view(self._scratch)
+        self._view_key = None
+        self._view = None
         self.load()
+        if self.producer is not None:
+            self._start_producer()
+
+    def _make_view(self, array):
+        fmt = self.audio_spec.format
+        try:
+            view_format, dtype = SAMPLE_TYPES[fmt]
+        except KeyError:
+            raise ValueError("unsupported audio format: 0x%x" % fmt)
+        if self.sample_view == 'numpy':
+            import numpy
+            return numpy.frombuffer(array, dtype).reshape(
+                -1, self.audio_spec.channels)
+        if (sdl2.SDL_AUDIO_BITSIZE(fmt) > 8 and
+                bool(sdl2.SDL_AUDIO_ISBIGENDIAN(fmt)) !=
+                (sys.byteorder == 'big')):
+            raise ValueError(
+                "audio format 0x%x is not in native byte order, "
+                "use sample_view = 'numpy'" % fmt)
+        return memoryview(array).cast('B').cast(view_format)
+
+    def _get_scratch(self, buflen):
+        if buflen > len(self._scratch):
+            self._scratch = (sdl2.Uint8 * buflen)()
+            self._scratch_view = self._make_view(self._scratch)
+        return self._scratch
+
+    def _scratch_samples(self, length):
+        data = self._get_scratch(length)
+        if len(data) == length:
+            return data, self._scratch_view
+        return data, self._scratch_view[:length // self._sample_size]
+
+    def _copy_samples(self, dest, src, length, volume=None):
+        if volume is None:
+            volume = self.volume
+        if volume >= sdl2.SDL_MIX_MAXVOLUME:
+            ctypes.memmove(dest, src, length)
+        else:
+            ctypes.memset(dest, self.audio_spec.silence, length)
+            sdl2.SDL_MixAudioFormat(
+                ctypes.cast(dest, ctypes.POINTER(sdl2.Uint8)),
+                ctypes.cast(src, ctypes.POINTER(sdl2.Uint8)),
+                self.audio_spec.format, length, volume)
+
+    def _render_chunk(self, length):
+        if type(self).fill is AudioDevice.fill:
+            data = self._get_scratch(length)
+            ctypes.memset(data, self.audio_spec.silence, length)
+            for i, v in zip(range(length), self.callback(length)):
+                data[i] = v
+        else:
+            data, view = self._scratch_samples(length)
+            self.fill(view)
+        return data
+
+    @property
+    def bytes_per_second(self):
+        return (
+            self.audio_spec.freq * self.audio_spec.channels *
+            sdl2.SDL_AUDIO_BITSIZE(self.audio_spec.format) // 8)
+
+    @property
+    def fill_level(self):
+        if self.producer == 'queue':
+            return sdl2.SDL_GetQueuedAudioSize(self.index)
+        elif self._ring is not None:
+            return self._ring.fill_level
+        return 0
+
+    @property
+    def latency(self):
+        return self.fill_level / self.bytes_per_second
+
+    def _start_producer(self):
+        self._buffer_size = max(
+            self.audio_spec.size,
+            int(self.props.get('buffer_time', 0.2) * self.bytes_per_second))
+        if self.producer == 'ring':
+            self._ring = RingBuffer(self._buffer_size)
+        self._producing = True
+        self._producer_thread = threading.Thread(
+            target=self._produce, name="%s producer" % type(self).__name__)
+        self._producer_thread.daemon = True
+        self._producer_thread.start()
+
+    def _stop_producer(self):
+        if self._producer_thread is None:
+            return
+        self._producing = False
+        if self._ring is not None:
+            self._ring.drained.set()
+        self._producer_thread.join()
+        self._producer_thread = None
+
+    def _produce(self):
+        chunk = self.audio_spec.size
+        period = chunk / self.bytes_per_second
+        if self.producer == 'queue':
+            output = (sdl2.Uint8 * chunk)()
+        while self._producing:
+            try:
+                if self.producer == 'ring':
+                    if self._ring.free < chunk:
+                        self._ring.drained.wait(period)
+                        self._ring.drained.clear()
+                        continue
+                    data = self._render_chunk(chunk)
+                    self._ring.write(ctypes.addressof(data), chunk)
+                else:
+                    queued = sdl2.SDL_GetQueuedAudioSize(self.index)
+                    if queued == 0 and not self.paused:
+                        self.underruns += 1
+                    if queued + chunk > self._buffer_size:
+                        sdl2.SDL_Delay(max(1, int(period * 500)))
+                        continue
+                    data = self._render_chunk(chunk)
+                    self._copy_samples(
+                        ctypes.addressof(output), ctypes.addressof(data),
+                        chunk)
+                    sdl2.SDL_QueueAudio(self.index, output, chunk)
+            except Exception:
+                self.logger.exception("Error in the audio producer")
+                self._producing = False
+
+    def _ring_callback(self, userdata, buf, buflen):
+        address = ctypes.addressof(buf.contents)
+        volume = self.volume
+        copied = self._ring.read(
+            address, buflen,
+            lambda dest, src, size: self._copy_samples(
+                dest, src, size, volume))
+        if copied < buflen:
+            self.underruns += 1
+            ctypes.memset(
+                address + copied, self.audio_spec.silence, buflen - copied)
 
     def _audio_callback(self, userdata, buf, buflen):
-        sdl2.SDL_memset(buf, 0, buflen)
-        data = (sdl2.Uint8 * buflen)()
+        sdl2.SDL_memset(buf, self.audio_spec.silence, buflen)
+        data = self._get_scratch(buflen)
         for i, v in zip(range(buflen), self.callback(buflen)):
             data[i] = v
         sdl2.SDL_MixAudioFormat(
             buf, data, self.audio_spec.format, buflen, self.volume)
 
+    def _fill_callback(self, userdata, buf, buflen):
+        volume = self.volume
+        if volume >= sdl2.SDL_MIX_MAXVOLUME:
+            # NOTE: zero-copy, the view wraps SDL's own buffer and is only
+            #       rebuilt when SDL hands over a different one
+            key = (ctypes.addressof(buf.contents), buflen)
+            if key != self._view_key:
+                self._view = self._make_view(
+                    (sdl2.Uint8 * buflen).from_address(key[0]))
+                self._view_key = key
+            self.fill(self._view)
+        else:
+            data, view = self._scratch_samples(buflen)
+            self.fill(view)
+            sdl2.SDL_memset(buf, self.audio_spec.silence, buflen)
+            sdl2.SDL_MixAudioFormat(
+                buf, data, self.audio_spec.format, buflen, volume)
+
+    @property
+    def _sample_size(self):
+        size = sdl2.SDL_AUDIO_BITSIZE(self.audio_spec.format) // 8
+        if self.sample_view == 'numpy':
+            size *= self.audio_spec.channels
+        return size
+
     def callback(self, length):
         return itertools.repeat(0)
 
+    def fill(self, samples):
+        # NOTE: override to write every sample of the buffer in place,
+        #       samples are interleaved in a flat memoryview or shaped
+        #       (frames, channels) when sample_view is 'numpy'
+        pass
+
     def quit(self, event):
         self.close()
 
@@ -48,6 +301,7 @@ class AudioDevice(sdl2ui.Component):
 
     def close(self):
         self.logger.info("Closing audio device %d", self.index)
+        self._stop_producer()
         sdl2.SDL_CloseAudioDevice(self.index)
         self.unload()
 
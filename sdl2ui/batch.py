@@ -0,0 +1,153 @@
+import ctypes
+import sdl2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def has_render_geometry():
+    if not hasattr(sdl2, 'SDL_RenderGeometry'):
+        return False
+    version = sdl2.SDL_version()
+    sdl2.SDL_GetVersion(ctypes.byref(version))
+    return (version.major, version.minor, version.patch) >= (2, 0, 18)
+
+
+def _tint_color(image):
+    if image._tint is None:
+        return (0xff, 0xff, 0xff, 0xff)
+    r, g, b = image._tint[:3]
+    return (r, g, b, 0xff)
+
+
+class SpriteBatch(object):
+    # NOTE: draws many sprites of a texture with a single SDL_RenderGeometry
+    #       call, the vertex and index buffers are kept between calls and
+    #       only grow
+    def __init__(self, app):
+        self.app = app
+        self.geometry = numpy is not None and has_render_geometry()
+        self._capacity = 0
+        self._vertices = None
+        self._indices = None
+
+    def _reserve(self, count):
+        if count <= self._capacity:
+            return
+        capacity = max(count, self._capacity * 2, 64)
+        self._vertices = numpy.zeros(capacity * 4, dtype=[
+            ('position', '<f4', 2),
+            ('color', 'u1', 4),
+            ('tex_coord', '<f4', 2),
+        ])
+        quads = numpy.arange(capacity, dtype=numpy.int32)[:, None] * 4
+        self._indices = (
+            quads + numpy.array([0, 1, 2, 0, 2, 3], dtype=numpy.int32)
+        ).ravel()
+        self._capacity = capacity
+
+    def draw(self, image, positions, sources=None, sizes=None, colors=None,
+             angles=None):
+        if self.geometry:
+            self._draw_geometry(
+                image, positions, sources, sizes, colors, angles)
+        else:
+            self._draw_copies(
+                image, positions, sources, sizes, colors, angles)
+
+    def _draw_geometry(self, image, positions, sources, sizes, colors,
+                       angles):
+        positions = numpy.asarray(positions, dtype=numpy.float32)
+        count = len(positions)
+        if count == 0:
+            return
+        self._reserve(count)
+        src = image.src
+        if sources is None:
+            sources = numpy.empty((count, 4), dtype=numpy.float32)
+            sources[:] = (0, 0, src.w, src.h)
+        else:
+            sources = numpy.asarray(sources, dtype=numpy.float32)
+        if sizes is None:
+            sizes = sources[:, 2:4]
+        else:
+            sizes = numpy.asarray(sizes, dtype=numpy.float32)
+        w = ctypes.c_int()
+        h = ctypes.c_int()
+        sdl2.SDL_QueryTexture(
+            image.texture, None, None, ctypes.byref(w), ctypes.byref(h))
+        # NOTE: corners in the order top-left, top-right, bottom-right,
+        #       bottom-left
+        unit = numpy.array(
+            [[0, 0], [1, 0], [1, 1], [0, 1]], dtype=numpy.float32)
+        corners = unit[None, :, :] * sizes[:, None, :]
+        if angles is not None:
+            radians = numpy.radians(numpy.asarray(angles, numpy.float32))
+            cos = numpy.cos(radians)[:, None]
+            sin = numpy.sin(radians)[:, None]
+            center = sizes[:, None, :] / 2
+            offset = corners - center
+            corners = center + numpy.stack([
+                offset[:, :, 0] * cos - offset[:, :, 1] * sin,
+                offset[:, :, 0] * sin + offset[:, :, 1] * cos,
+            ], axis=-1)
+        vertices = self._vertices[:count * 4]
+        vertices['position'] = (
+            corners + positions[:, None, :]).reshape(-1, 2)
+        texel = sources[:, None, 0:2] + unit[None, :, :] * sources[:, None, 2:4]
+        texel += (src.x, src.y)
+        texel /= (w.value, h.value)
+        vertices['tex_coord'] = texel.reshape(-1, 2)
+        # NOTE: SDL_RenderGeometry ignores the color modulation of the
+        #       texture, the tint is applied to the vertices instead. Like
+        #       with SDL_SetTextureColorMod, the alpha of the tint is ignored.
+        tint = numpy.array(_tint_color(image), numpy.uint16)
+        if colors is None:
+            vertices['color'] = tint.astype(numpy.uint8)
+        else:
+            color = numpy.asarray(colors, numpy.uint16) * tint // 0xff
+            vertices['color'] = numpy.repeat(
+                color.astype(numpy.uint8), 4, axis=0)
+        sdl2.SDL_RenderGeometry(
+            self.app.renderer, image.texture,
+            vertices.ctypes.data_as(ctypes.POINTER(sdl2.SDL_Vertex)),
+            count * 4,
+            self._indices.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+            count * 6)
+
+    def _draw_copies(self, image, positions, sources, sizes, colors,
+                     angles):
+        renderer = self.app.renderer
+        texture = image.texture
+        src = sdl2.SDL_Rect(image.src.x, image.src.y, image.src.w, image.src.h)
+        dest = sdl2.SDL_Rect()
+        tint = _tint_color(image)
+        try:
+            for i, (x, y) in enumerate(positions):
+                if sources is not None:
+                    sx, sy, src.w, src.h = [int(v) for v in sources[i]]
+                    src.x = image.src.x + sx
+                    src.y = image.src.y + sy
+                dest.x = int(x)
+                dest.y = int(y)
+                if sizes is not None:
+                    dest.w, dest.h = [int(v) for v in sizes[i]]
+                else:
+                    dest.w, dest.h = src.w, src.h
+                if colors is not None:
+                    r, g, b, a = [
+                        int(c) * t // 0xff for c, t in zip(colors[i], tint)]
+                    sdl2.SDL_SetTextureColorMod(texture, r, g, b)
+                    sdl2.SDL_SetTextureAlphaMod(texture, a)
+                if angles is not None:
+                    sdl2.SDL_RenderCopyEx(
+                        renderer, texture, src, dest, float(angles[i]),
+                        None, sdl2.SDL_FLIP_NONE)
+                else:
+                    sdl2.SDL_RenderCopy(renderer, texture, src, dest)
+        finally:
+            if colors is not None:
+                sdl2.SDL_SetTextureColorMod(texture, *tint[:3])
+                sdl2.SDL_SetTextureAlphaMod(texture, 0xff)
@@ -0,0 +1,309 @@
+import argparse
+import ctypes
+import gc
+import json
+import logging
+import math
+import sys
+import time
+
+import sdl2
+
+import sdl2ui
+from sdl2ui.app import App
+from sdl2ui.audio import AudioDevice
+
+
+logger = logging.getLogger(__name__)
+
+
+class TreeNode(sdl2ui.Component):
+    def init(self):
+        depth = self.props['depth']
+        if depth > 0:
+            for i in range(self.props['breadth']):
+                self.add_component(
+                    TreeNode, depth=depth - 1, breadth=self.props['breadth'],
+                    x=self.props['x'] + i * 6, y=self.props['y'] + 8).enable()
+
+    def render(self):
+        self.app.draw(
+            'font-6', x=self.props['x'] % 320, y=self.props['y'] % 240,
+            w=4, h=4)
+
+
+class DeepTree(sdl2ui.Component):
+    def init(self):
+        self.add_component(
+            TreeNode, depth=self.props.get('depth', 6),
+            breadth=self.props.get('breadth', 3), x=0, y=0).enable()
+
+    def peek(self):
+        return True
+
+
+class HeavyText(sdl2ui.Component):
+    def init(self):
+        self.frame = 0
+
+    def peek(self):
+        self.frame += 1
+        return True
+
+    def render(self):
+        for i in range(self.props.get('lines', 30)):
+            with self.app.tint((0xff, i * 8 % 0x100, 0x80, 0xff)):
+                self.app.write('font-6', 0, i * 8, "line %d static text" % i)
+            self.app.write(
+                'font-6', 160, i * 8, "frame %d" % (self.frame + i))
+
+
+class ManyTimers(sdl2ui.Component):
+    def init(self):
+        self.calls = 0
+        for i in range(self.props.get('count', 500)):
+            self.app.add_timer(1 + i % 50, self._tick, repeat=True)
+
+    def peek(self):
+        for i in range(self.props.get('per_frame', 50)):
+            timer = self.app.add_timer(i % 3, self._tick)
+            if i % 5 == 0:
+                timer.cancel()
+        return False
+
+    def _tick(self):
+        self.calls += 1
+
+
+class EventFlood(sdl2ui.Component):
+    def init(self):
+        self.received = 0
+        self.event = sdl2.SDL_Event()
+        self.event.type = sdl2.SDL_USEREVENT
+        for i in range(self.props.get('listeners', 20)):
+            self.add_component(EventListener).enable()
+
+    def peek(self):
+        for i in range(self.props.get('events', 200)):
+            sdl2.SDL_PushEvent(self.event)
+        return False
+
+
+class EventListener(sdl2ui.Component):
+    def init(self):
+        self.received = 0
+        self.register_event_handler(sdl2.SDL_USEREVENT, self._received)
+
+    def _received(self, event):
+        self.received += 1
+
+
+class SineDevice(AudioDevice):
+    sample_view = 'memoryview'
+
+    def load(self):
+        self.phase = 0
+
+    def fill(self, samples):
+        phase = self.phase
+        for i in range(0, len(samples), 2):
+            samples[i] = samples[i + 1] = int(
+                8000 * math.sin(phase * 0.0626))
+            phase += 1
+        self.phase = phase
+
+
+class AudioCallbacks(sdl2ui.Component):
+    # NOTE: the callback of a paused device is called synchronously so its
+    #       cost is measured in the main thread
+    def init(self):
+        sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_AUDIO)
+        self.device = self.add_component(
+            self.props.get('device', SineDevice), frequency=44100,
+            format=sdl2.AUDIO_S16SYS, channels=2,
+            chunksize=self.props.get('chunksize', 512),
+            **self.props.get('device_props', {}))
+        self.buffer = (sdl2.Uint8 * self.device.audio_spec.size)()
+        self.pointer = ctypes.cast(self.buffer, ctypes.POINTER(sdl2.Uint8))
+
+    def peek(self):
+        profiler = self.app.profiler
+        for i in range(self.props.get('callbacks', 2)):
+            start = sdl2.SDL_GetPerformanceCounter()
+            self.device._fill_callback(None, self.pointer, len(self.buffer))
+            if profiler.enabled:
+                profiler.record(
+                    'audio', 'audio', start,
+                    sdl2.SDL_GetPerformanceCounter() - start)
+        return False
+
+    def deactivate(self):
+        self.device.close()
+
+
+class SynthVoices(sdl2ui.Component):
+    # NOTE: the software mixer needs numpy, it is only imported by this scene
+    def init(self):
+        from sdl2ui.synth import Sound, SoftwareMixer
+        self.callbacks = self.add_component(
+            AudioCallbacks, device=SoftwareMixer,
+            device_props={
+                'resampling': self.props.get('resampling', 'linear')})
+        self.callbacks.enable()
+        device = self.callbacks.device
+        ramp = [math.sin(i * 0.05) * 0.1 for i in range(22050)]
+        sound = Sound(ramp, 22050)
+        for i in range(self.props.get('voices', 32)):
+            device.play(
+                sound, gain=0.5, pan=i % 3 - 1, pitch=1 + i * 0.01, loops=-1)
+
+
+SCENES = {
+    'deep_tree': (DeepTree, {}),
+    'heavy_text': (HeavyText, {}),
+    'many_timers': (ManyTimers, {}),
+    'event_flood': (EventFlood, {}),
+    'audio_callbacks': (AudioCallbacks, {}),
+    'synth_linear': (SynthVoices, {'resampling': 'linear'}),
+    'synth_polyphase': (SynthVoices, {'resampling': 'polyphase'}),
+}
+
+
+class BenchmarkApp(App):
+    # NOTE: the scene runs twice the number of frames, the first half with
+    #       the profiler for the cost of the phases, the second half without
+    #       for the frame rate and the allocations
+    name = "sdl2ui benchmark"
+
+    def init(self):
+        self.frames = 0
+        self.measure = None
+        scene, props = self.props['scene']
+        self.add_component(scene, **props).enable()
+
+    def peek(self):
+        self.frames += 1
+        if self.frames == self.props['frames']:
+            self.profiler.disable()
+        elif self.frames == self.props['frames'] + 1:
+            # NOTE: the lifecycle calls are not wrapped anymore
+            gc.collect()
+            self.measure = (
+                time.time(), gc.get_stats()[0]['collections'],
+                sys.getallocatedblocks())
+        elif self.frames > self.props['frames'] * 2:
+            start, collections, blocks = self.measure
+            self.measure = (
+                time.time() - start,
+                gc.get_stats()[0]['collections'] - collections,
+                sys.getallocatedblocks() - blocks)
+            self._running = False
+        return False
+
+
+def run_scene(name, frames=300, **props):
+    scene = SCENES[name]
+    props.setdefault('width', 320)
+    props.setdefault('height', 240)
+    start = time.time()
+    # NOTE: the frame rate is not capped and no frame is ever skipped
+    app = BenchmarkApp(
+        scene=scene, frames=frames, headless=True, profile=True, fps=1000000,
+        max_frame_skip=0, profile_capacity=frames * 64, **props)
+    setup = time.time() - start
+    app.loop()
+    seconds, collections, blocks = app.measure
+    summary = app.profiler.summary()
+    return {
+        'frames': frames,
+        'setup': setup,
+        'seconds': seconds,
+        'fps': frames / seconds if seconds else 0.0,
+        'phases': dict(
+            (key, {'mean': value['mean'], 'p99': value['p99']})
+            for key, value in summary.items()
+            if value['category'] in ('phase', 'frame', 'audio')),
+        # NOTE: CPython does not count allocations, the collections of the
+        #       youngest generation are triggered every gc threshold
+        #       container allocations and the allocated blocks left after the
+        #       frames show what is retained
+        'gc_per_frame': collections / frames,
+        'blocks_per_frame': blocks / frames,
+    }
+
+
+def run(names=None, frames=300):
+    results = {}
+    for name in names or sorted(SCENES):
+        logger.info("Running scene %s...", name)
+        results[name] = run_scene(name, frames)
+    return results
+
+
+def compare(results, baseline, tolerance=0.1, threshold=0.00005):
+    # NOTE: a phase is only reported when it is slower by more than the
+    #       tolerance and by more than threshold seconds to ignore the noise
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        if result['fps'] < reference['fps'] * (1 - tolerance):
+            regressions.append("%s: %.1f fps instead of %.1f" % (
+                name, result['fps'], reference['fps']))
+        for phase, stats in sorted(result['phases'].items()):
+            if phase not in reference['phases']:
+                continue
+            mean = stats['mean']
+            previous = reference['phases'][phase]['mean']
+            if (mean > previous * (1 + tolerance) and
+                    mean - previous > threshold):
+                regressions.append("%s: %s takes %.3fms instead of %.3fms" % (
+                    name, phase, mean * 1000, previous * 1000))
+    return regressions
+
+
+def report(results):
+    lines = []
+    for name, result in sorted(results.items()):
+        lines.append("%-16s %8.1f fps %6.2f gc/frame %8.1f blocks/frame" % (
+            name, result['fps'], result['gc_per_frame'],
+            result['blocks_per_frame']))
+        for phase, stats in sorted(result['phases'].items()):
+            lines.append("    %-10s %8.3fms (p99 %.3fms)" % (
+                phase, stats['mean'] * 1000, stats['p99'] * 1000))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m sdl2ui.benchmark",
+        description="Run the sdl2ui main loop headless on synthetic scenes.")
+    parser.add_argument(
+        'scenes', nargs='*', help="among: %s" % ", ".join(sorted(SCENES)))
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--save', help="write the results to a JSON file")
+    parser.add_argument('--baseline', help="compare with a JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+    for name in args.scenes:
+        if name not in SCENES:
+            parser.error("unknown scene: %s" % name)
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args.scenes, args.frames)
+    print(report(results))
+    if args.save:
+        with open(args.save, 'w') as fileobj:
+            json.dump(results, fileobj, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as fileobj:
+            baseline = json.load(fileobj)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("REGRESSION %s" % regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
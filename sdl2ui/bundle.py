@@ -0,0 +1,97 @@
+import ctypes
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+
+import sdl2
+
+
+# NOTE: file layout: MAGIC, index length (uint32 little endian), JSON index
+#       mapping every name to its (offset, size) in the data that follows
+MAGIC = b'SDL2UIB\x01'
+HEADER = struct.Struct('<8sI')
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(name):
+    return os.path.normpath(name).replace(os.sep, '/')
+
+
+def build_bundle(directory, output):
+    names = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for filename in sorted(files):
+            filepath = os.path.join(root, filename)
+            if os.path.abspath(filepath) == os.path.abspath(output):
+                continue
+            names.append(
+                (normalize(os.path.relpath(filepath, directory)), filepath))
+    index = {}
+    offset = 0
+    for name, filepath in names:
+        size = os.path.getsize(filepath)
+        index[name] = [offset, size]
+        offset += size
+    encoded_index = json.dumps(index, sort_keys=True).encode('utf-8')
+    with open(output, 'wb') as fileobj:
+        fileobj.write(HEADER.pack(MAGIC, len(encoded_index)))
+        fileobj.write(encoded_index)
+        for name, filepath in names:
+            with open(filepath, 'rb') as source:
+                fileobj.write(source.read())
+    logger.info("Bundle %s built with %d files", output, len(names))
+    return index
+
+
+class Bundle(object):
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fileobj:
+            # NOTE: a private copy-on-write mapping is needed to get a
+            #       ctypes buffer on it, nothing is ever written back
+            self._mmap = mmap.mmap(
+                fileobj.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError("not a resource bundle: %s" % path)
+        start = HEADER.size
+        self.index = json.loads(
+            self._mmap[start:start + index_length].decode('utf-8'))
+        self._buffer = (ctypes.c_char * len(self._mmap)).from_buffer(
+            self._mmap)
+        self._data = ctypes.addressof(self._buffer) + start + index_length
+
+    def __contains__(self, name):
+        return normalize(name) in self.index
+
+    def size(self, name):
+        return self.index[normalize(name)][1]
+
+    def open_rw(self, name):
+        offset, size = self.index[normalize(name)]
+        return sdl2.SDL_RWFromConstMem(self._data + offset, size)
+
+    def close(self):
+        if self._mmap is None:
+            return
+        del self._buffer
+        self._mmap.close()
+        self._mmap = None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit("usage: python -m sdl2ui.bundle DIRECTORY OUTPUT")
+    logging.basicConfig(level=logging.INFO)
+    build_bundle(*argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    # NOTE: the values are evicted by least recent use when the sum of their
+    #       sizes is above the budget, a budget of None never evicts.
+    #       on_evict(key, value) is called for every value evicted or
+    #       discarded, pinned(key, value) tells the values that can not be
+    #       evicted for now.
+    def __init__(self, budget, on_evict=None, pinned=None):
+        self.budget = budget
+        self.on_evict = on_evict
+        self.pinned = pinned
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def get(self, key, default=None):
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value, size):
+        self.discard(key)
+        if self.budget is not None and size > self.budget:
+            return False
+        self._entries[key] = (value, size)
+        self.size += size
+        self.shrink(keep=key)
+        return True
+
+    def pop(self, key, default=None):
+        # NOTE: removes the value without calling on_evict
+        if key not in self._entries:
+            return default
+        value, size = self._entries.pop(key)
+        self.size -= size
+        return value
+
+    def discard(self, key):
+        if key not in self._entries:
+            return
+        value, size = self._entries.pop(key)
+        self.size -= size
+        if self.on_evict:
+            self.on_evict(key, value)
+
+    def clear(self):
+        while self._entries:
+            self.discard(next(iter(self._entries)))
+
+    def reserve(self, size, keep=None):
+        # NOTE: evicts the least recently used values until size more fits
+        #       in the budget, tells if it does
+        if self.budget is None:
+            return True
+        for key in list(self._entries):
+            if self.size + size <= self.budget:
+                break
+            if key == keep or key not in self._entries:
+                continue
+            if self.pinned and self.pinned(key, self._entries[key][0]):
+                continue
+            self.discard(key)
+        return self.size + size <= self.budget
+
+    def shrink(self, keep=None):
+        self.reserve(0, keep)
@@ -0,0 +1,161 @@
+import collections
+import ctypes
+import logging
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import sdl2
+
+
+def _png_chunk(kind, data):
+    return (
+        struct.pack('>I', len(data)) + kind + data +
+        struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+
+def encode_png(pixels, width, height, level=1):
+    # NOTE: pixels are RGB24 rows without padding, every row is prefixed
+    #       with the filter type 0 (none)
+    stride = width * 3
+    view = memoryview(pixels)
+    raw = bytearray((stride + 1) * height)
+    for y in range(height):
+        start = y * (stride + 1) + 1
+        raw[start:start + stride] = view[y * stride:(y + 1) * stride]
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack(
+            '>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        _png_chunk(b'IDAT', zlib.compress(bytes(raw), level)),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+class Recorder(object):
+    # NOTE: the pixels of the rendered frames are read before they are
+    #       presented into a pool of buffers. An encoder thread writes them
+    #       and puts the buffers back in the pool. When the pool is empty the
+    #       encoder is behind and the frame is dropped instead of waiting.
+    #
+    #       'png' writes frame-NNNNNN.png in the directory path, 'raw' appends
+    #       the RGB24 frames to the file path, e.g. for:
+    #           ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -i path out.mp4
+    #       The index and the ticks of every frame written are listed in
+    #       path/frames.txt in 'png' and in path + '.txt' in 'raw'.
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, app, path, format='png', buffers=4, level=1):
+        if format not in ('png', 'raw'):
+            raise ValueError("unknown capture format: %r" % format)
+        self.app = app
+        self.path = path
+        self.format = format
+        self.level = level
+        self.width, self.height = self._output_size()
+        self.pitch = self.width * 3
+        self._free = collections.deque(
+            (ctypes.c_uint8 * (self.pitch * self.height))()
+            for i in range(buffers))
+        self._jobs = queue.Queue()
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.error = None
+        if format == 'png':
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            self._index = open(os.path.join(path, 'frames.txt'), 'w')
+            self._output = None
+        else:
+            self._index = open(path + '.txt', 'w')
+            self._output = open(path, 'wb')
+        self._thread = threading.Thread(
+            target=self._encode, name="%s encoder" % type(self).__name__)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _output_size(self):
+        # NOTE: the size of the render target, the frame target if any
+        w = ctypes.c_int()
+        h = ctypes.c_int()
+        sdl2.SDL_GetRendererOutputSize(
+            self.app.renderer, ctypes.byref(w), ctypes.byref(h))
+        return w.value, h.value
+
+    def capture(self):
+        # NOTE: must be called after the frame is rendered and before it is
+        #       presented
+        if self._output_size() != (self.width, self.height):
+            if not self.dropped:
+                self.logger.warning(
+                    "Output size changed, frames are dropped")
+            self.dropped += 1
+            return False
+        try:
+            buffer = self._free.popleft()
+        except IndexError:
+            self.dropped += 1
+            return False
+        if sdl2.SDL_RenderReadPixels(
+                self.app.renderer, None, sdl2.SDL_PIXELFORMAT_RGB24,
+                buffer, self.pitch) != 0:
+            self._free.append(buffer)
+            self.dropped += 1
+            self.logger.warning(
+                "Can not read pixels: %s", sdl2.SDL_GetError().decode())
+            return False
+        self._jobs.put((self.captured, sdl2.SDL_GetTicks(), buffer))
+        self.captured += 1
+        return True
+
+    def _encode(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            index, ticks, buffer = job
+            try:
+                if self.error is None:
+                    self._write(index, ticks, buffer)
+                    self.written += 1
+            except Exception as exc:
+                self.logger.exception("Error while writing the capture")
+                self.error = exc
+            finally:
+                self._free.append(buffer)
+
+    def _write(self, index, ticks, buffer):
+        if self.format == 'png':
+            filename = os.path.join(self.path, 'frame-%06d.png' % index)
+            with open(filename, 'wb') as fileobj:
+                fileobj.write(encode_png(
+                    buffer, self.width, self.height, self.level))
+        else:
+            self._output.write(buffer)
+        self._index.write("%d %d\n" % (index, ticks))
+
+    @property
+    def pending(self):
+        return self._jobs.qsize()
+
+    def stats(self):
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'written': self.written,
+            'pending': self.pending,
+        }
+
+    def stop(self):
+        # NOTE: waits for the frames already captured to be written
+        self._jobs.put(None)
+        self._thread.join()
+        self._index.close()
+        if self._output is not None:
+            self._output.close()
+        self.logger.info(
+            "Recorded %d frames in %s, %d dropped",
+            self.written, self.path, self.dropped)
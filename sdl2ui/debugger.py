@@ -1,9 +1,12 @@
 import sdl2
 
 import sdl2ui
+from sdl2ui.profiler import PHASES
 
 
 class Debugger(sdl2ui.Component):
+    animated = True
+
     def init(self):
         self.frames = 0
         self.p1 = sdl2.SDL_GetPerformanceCounter()
@@ -27,3 +30,46 @@ class Debugger(sdl2ui.Component):
         if (self.p2 - self.p1) >= self.threshold:
             self.p1 = self.p2
             self.frames = 0
+
+
+class ProfilerOverlay(Debugger):
+    # NOTE: shows the 50th and 99th percentiles of the loop phases in
+    #       milliseconds and the slowest lifecycle calls below the frame rate
+    def activate(self):
+        self.lines = []
+        self.updated = sdl2.SDL_GetPerformanceCounter()
+        if self.props.get('enable_profiler', True):
+            self.app.profiler.enable()
+
+    def deactivate(self):
+        if self.props.get('enable_profiler', True):
+            self.app.profiler.disable()
+
+    def peek(self):
+        now = sdl2.SDL_GetPerformanceCounter()
+        if now - self.updated < self.threshold:
+            return False
+        self.updated = now
+        summary = self.app.profiler.summary()
+        lines = []
+        for phase in PHASES:
+            if phase in summary:
+                lines.append("%-7s %6.2f %6.2f" % (
+                    phase,
+                    summary[phase]['p50'] * 1000,
+                    summary[phase]['p99'] * 1000))
+        calls = sorted(
+            (x for x in summary.items()
+             if x[1]['category'] in ('peek', 'render')),
+            key=lambda x: x[1]['p99'], reverse=True)
+        for name, stats in calls[:self.props.get('components', 5)]:
+            lines.append("%s %.2f" % (name[:20], stats['p99'] * 1000))
+        self.lines = lines
+        return True
+
+    def render(self):
+        x = self.props.get('x', 0)
+        y = self.props.get('y', 0)
+        line_h = self.app.resources['font-6'].font_h + 1
+        for i, line in enumerate(self.lines):
+            self.app.write('font-6', x, y + (i + 1) * line_h, line)
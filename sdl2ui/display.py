@@ -0,0 +1,159 @@
+import ctypes
+import sdl2
+
+
+WHITE = (0xff, 0xff, 0xff)
+EVERYWHERE = (-(1 << 30), -(1 << 30), 1 << 31, 1 << 31)
+
+
+class DisplayList(object):
+    # NOTE: a command is (state, texture, src, dest) where state is the
+    #       (texture address, tint) pair the commands are sorted by and the
+    #       rects are plain (x, y, w, h) tuples or None. A call is recorded
+    #       as (None, function, args, None) and is never reordered. The
+    #       addresses of the textures copied are kept in textures.
+    def __init__(self, generation):
+        self.generation = generation
+        self.commands = []
+        self.textures = set()
+
+    def __len__(self):
+        return len(self.commands)
+
+    def copy(self, texture, tint, src, dest):
+        address = ctypes.cast(texture, ctypes.c_void_p).value
+        self.textures.add(address)
+        self.commands.append((
+            (address, WHITE if tint is None else tuple(tint[:3])),
+            texture,
+            None if src is None else (src.x, src.y, src.w, src.h),
+            None if dest is None else (dest.x, dest.y, dest.w, dest.h),
+        ))
+
+    def call(self, function, *args):
+        self.commands.append((None, function, args, None))
+
+
+def _overlaps(a, b):
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+class _Grid(object):
+    # NOTE: the rects already placed by cell of cell x cell pixels with the
+    #       index of their bucket, a rect covering too many cells is kept
+    #       aside as if it covered everything
+    cell = 32
+    max_cells = 256
+
+    def __init__(self):
+        self.cells = {}
+        self.everywhere = -1
+        self.last = -1
+
+    def _cells(self, rect):
+        if rect is EVERYWHERE:
+            return None
+        if rect[2] <= 0 or rect[3] <= 0:
+            return []
+        x1 = rect[0] // self.cell
+        y1 = rect[1] // self.cell
+        x2 = (rect[0] + rect[2] - 1) // self.cell
+        y2 = (rect[1] + rect[3] - 1) // self.cell
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > self.max_cells:
+            return None
+        return [(x, y) for y in range(y1, y2 + 1) for x in range(x1, x2 + 1)]
+
+    def last_overlap(self, rect):
+        # NOTE: the index of the last bucket holding a rect that overlaps
+        cells = self._cells(rect)
+        if cells is None:
+            return self.last
+        result = self.everywhere
+        for cell in cells:
+            for other, index in self.cells.get(cell, ()):
+                if index > result and _overlaps(other, rect):
+                    result = index
+        return result
+
+    def add(self, rect, index):
+        self.last = max(self.last, index)
+        cells = self._cells(rect)
+        if cells is None:
+            self.everywhere = max(self.everywhere, index)
+            return
+        entry = (rect, index)
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(entry)
+
+
+def sort_commands(commands):
+    # NOTE: every command joins the last bucket of the same state if it
+    #       comes after the last bucket the command overlaps, so the commands
+    #       it covers are still drawn before it. Overlapping commands keep
+    #       their order.
+    buckets = []
+    latest = {}
+    grid = _Grid()
+    for command in commands:
+        state = command[0]
+        rect = command[3] or EVERYWHERE
+        index = latest.get(state, -1)
+        if index < 0 or index < grid.last_overlap(rect):
+            index = len(buckets)
+            buckets.append([])
+            latest[state] = index
+        buckets[index].append(command)
+        grid.add(rect, index)
+    return [command for bucket in buckets for command in bucket]
+
+
+def sort_run(display_lists):
+    # NOTE: the calls split the run in segments that are sorted separately
+    result = []
+    segment = []
+    for display_list in display_lists:
+        for command in display_list.commands:
+            if command[0] is None:
+                result.extend(sort_commands(segment))
+                result.append(command)
+                segment = []
+            else:
+                segment.append(command)
+    result.extend(sort_commands(segment))
+    return result
+
+
+def _reset_tints(tints):
+    for tint, texture in tints.values():
+        if tint != WHITE:
+            sdl2.SDL_SetTextureColorMod(texture, *WHITE)
+    tints.clear()
+
+
+def replay(renderer, commands):
+    src = sdl2.SDL_Rect()
+    dest = sdl2.SDL_Rect()
+    # NOTE: color modulation set on the textures during the replay, they are
+    #       reset to white at the end like Image.tint() would do
+    tints = {}
+    try:
+        for state, texture, src_rect, dest_rect in commands:
+            if state is None:
+                _reset_tints(tints)
+                texture(*src_rect)
+                continue
+            address, tint = state
+            if tints.get(address, (WHITE,))[0] != tint:
+                sdl2.SDL_SetTextureColorMod(texture, *tint)
+                tints[address] = (tint, texture)
+            if src_rect is not None:
+                src.x, src.y, src.w, src.h = src_rect
+            if dest_rect is not None:
+                dest.x, dest.y, dest.w, dest.h = dest_rect
+            sdl2.SDL_RenderCopy(
+                renderer, texture,
+                None if src_rect is None else src,
+                None if dest_rect is None else dest)
+    finally:
+        _reset_tints(tints)
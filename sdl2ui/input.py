@@ -0,0 +1,147 @@
+from array import array
+import ctypes
+import sdl2
+
+
+class ButtonState(object):
+    # NOTE: one byte per button in a snapshot, the masks of a frame are
+    #       computed at once on the snapshots seen as big integers
+    def __init__(self, size):
+        self.size = size
+        self._empty = bytes(size)
+        self._previous = 0
+        self.held = self.pressed = self.released = self._empty
+
+    def update(self, snapshot):
+        current = int.from_bytes(snapshot, 'little')
+        previous = self._previous
+        if current == previous:
+            if self.pressed is not self._empty:
+                self.pressed = self.released = self._empty
+            return
+        changed = current ^ previous
+        self.held = bytes(snapshot)
+        self.pressed = (changed & current).to_bytes(self.size, 'little')
+        self.released = (changed & previous).to_bytes(self.size, 'little')
+        self._previous = current
+
+
+class KeyboardState(ButtonState):
+    def __init__(self):
+        numkeys = ctypes.c_int()
+        self._live = sdl2.SDL_GetKeyboardState(ctypes.byref(numkeys))
+        ButtonState.__init__(self, numkeys.value)
+        self._snapshot = (ctypes.c_uint8 * self.size)()
+
+    def update(self):
+        ctypes.memmove(self._snapshot, self._live, self.size)
+        ButtonState.update(self, self._snapshot)
+
+
+class MouseState(object):
+    # NOTE: the position is in the coordinates of the frame
+    def __init__(self, app):
+        self.app = app
+        self._x = ctypes.c_int()
+        self._y = ctypes.c_int()
+        self.x = self.y = self.dx = self.dy = 0
+        self.held = self.pressed = self.released = 0
+
+    def update(self):
+        buttons = sdl2.SDL_GetMouseState(
+            ctypes.byref(self._x), ctypes.byref(self._y))
+        changed = buttons ^ self.held
+        self.pressed = changed & buttons
+        self.released = changed & self.held
+        self.held = buttons
+        x, y = self.app.to_logical(self._x.value, self._y.value)
+        self.dx = x - self.x
+        self.dy = y - self.y
+        self.x = x
+        self.y = y
+
+
+class JoystickState(object):
+    def __init__(self, joystick):
+        self.joystick = joystick
+        self.axes = array(
+            'h', [0] * max(0, sdl2.SDL_JoystickNumAxes(joystick)))
+        self.hats = bytearray(max(0, sdl2.SDL_JoystickNumHats(joystick)))
+        self.previous_hats = bytes(self.hats)
+        self.buttons = ButtonState(
+            max(0, sdl2.SDL_JoystickNumButtons(joystick)))
+        self._snapshot = bytearray(self.buttons.size)
+
+    def update(self):
+        joystick = self.joystick
+        get_axis = sdl2.SDL_JoystickGetAxis
+        axes = self.axes
+        for i in range(len(axes)):
+            axes[i] = get_axis(joystick, i)
+        get_button = sdl2.SDL_JoystickGetButton
+        snapshot = self._snapshot
+        for i in range(len(snapshot)):
+            snapshot[i] = get_button(joystick, i)
+        self.buttons.update(snapshot)
+        self.previous_hats = bytes(self.hats)
+        get_hat = sdl2.SDL_JoystickGetHat
+        hats = self.hats
+        for i in range(len(hats)):
+            hats[i] = get_hat(joystick, i)
+
+    def axis(self, i):
+        return self.axes[i]
+
+    def held(self, button):
+        return bool(self.buttons.held[button])
+
+    def pressed(self, button):
+        return bool(self.buttons.pressed[button])
+
+    def released(self, button):
+        return bool(self.buttons.released[button])
+
+    def hat(self, i):
+        return self.hats[i]
+
+    def hat_pressed(self, i, direction):
+        return bool(
+            self.hats[i] & direction and
+            not self.previous_hats[i] & direction)
+
+
+class Input(object):
+    # NOTE: the state of the keyboard, the mouse and the opened joysticks is
+    #       copied once per frame after the events have been polled. The
+    #       handlers read the snapshot and the edges of the frame, an input
+    #       pressed and released between two frames is only seen as events.
+    def __init__(self, app):
+        self.app = app
+        self.keyboard = KeyboardState()
+        self.mouse = MouseState(app)
+        self.joysticks = {}
+
+    def add_joystick(self, joystick):
+        self.joysticks[sdl2.SDL_JoystickInstanceID(joystick)] = \
+            JoystickState(joystick)
+
+    def remove_joystick(self, joystick_id):
+        self.joysticks.pop(joystick_id, None)
+
+    def update(self):
+        self.keyboard.update()
+        self.mouse.update()
+        for joystick in self.joysticks.values():
+            joystick.update()
+
+    def held(self, scancode):
+        return bool(self.keyboard.held[scancode])
+
+    def pressed(self, scancode):
+        return bool(self.keyboard.pressed[scancode])
+
+    def released(self, scancode):
+        return bool(self.keyboard.released[scancode])
+
+    def joystick(self, joystick_id):
+        return self.joysticks.get(joystick_id)
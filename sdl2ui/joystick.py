@@ -12,6 +12,7 @@ class Joystick(object):
         self.manager = manager
         self.joystick = None
         self.id = -1
+        self._index = index
         self.name = sdl2.SDL_JoystickNameForIndex(index).decode()
         guid = sdl2.SDL_JoystickGetDeviceGUID(index)
         self.guid = "".join(map("{:02x}".format, guid.data))
@@ -20,7 +21,7 @@ class Joystick(object):
 
     @property
     def index(self):
-        return self.manager.joysticks.index(self)
+        return self._index
 
     @property
     def opened(self):
@@ -40,12 +41,14 @@ class Joystick(object):
                 "Joystick %d opened: %s (%s)",
                 self.index, self.name, self.guid)
             self.id = sdl2.SDL_JoystickInstanceID(self.joystick)
+            self.manager.opened(self)
 
     def close(self):
         if not self.opened:
             return
         sdl2.SDL_JoystickClose(self.joystick)
         self.logger.info("Joystick %d removed: %s", self.index, self.name)
+        self.manager.closed(self)
         self.joystick = None
         self.id = -1
 
@@ -53,6 +56,8 @@ class Joystick(object):
 class JoystickManager(sdl2ui.Component):
     def init(self):
         self.joysticks = []
+        # NOTE: the opened joysticks by instance id
+        self._by_id = {}
         sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_JOYSTICK)
         self.app.register_event_handler(sdl2.SDL_QUIT, self.quit)
         self.app.register_event_handler(sdl2.SDL_JOYDEVICEADDED, self.added)
@@ -76,9 +81,14 @@ class JoystickManager(sdl2ui.Component):
         #       anyway if it is referenced somewhere else.
         # NOTE: event.jdevice.which is the joystick id during a
         #       JOYDEVICEREMOVED event (not index!)
-        for joystick in list(self.joysticks):
-            if joystick.id == event.jdevice.which:
-                self.joysticks.remove(joystick)
+        joystick = self._by_id.pop(event.jdevice.which, None)
+        if joystick is None:
+            return
+        self.app.input.remove_joystick(joystick.id)
+        # NOTE: the index of the next joysticks is shifted like SDL does
+        del self.joysticks[joystick.index]
+        for i in range(joystick.index, len(self.joysticks)):
+            self.joysticks[i]._index = i
 
     def quit(self, event):
         for joystick in self.joysticks:
@@ -88,13 +98,22 @@ class JoystickManager(sdl2ui.Component):
         return self.joysticks[index]
 
     def find(self, id):
-        for joystick in self.joysticks:
-            if joystick.id == id:
-                return joystick
-        return None
+        return self._by_id.get(id)
+
+    def opened(self, joystick):
+        self._by_id[joystick.id] = joystick
+        self.app.input.add_joystick(joystick.joystick)
+
+    def closed(self, joystick):
+        if self._by_id.get(joystick.id) is joystick:
+            del self._by_id[joystick.id]
+        self.app.input.remove_joystick(joystick.id)
 
     def reload(self):
         sdl2.SDL_QuitSubSystem(sdl2.SDL_INIT_JOYSTICK)
+        for joystick_id in self._by_id:
+            self.app.input.remove_joystick(joystick_id)
+        self._by_id.clear()
         self.joysticks.clear()
         sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_JOYSTICK)
         sdl2.SDL_PumpEvents()
@@ -0,0 +1,159 @@
+import collections
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import logging
+import sdl2
+
+from sdl2ui.resource import load as resource_loader
+
+
+class Placeholder(object):
+    placeholder = True
+
+    def __init__(self, app, key=None):
+        self.app = app
+        self.key = key
+
+    def _delegate(self, method, *args, **kwargs):
+        if self.key is not None:
+            return getattr(self.app.resources[self.key], method)(
+                *args, **kwargs)
+
+    def draw(self, *args, **kwargs):
+        return self._delegate('draw', *args, **kwargs)
+
+    def write(self, *args, **kwargs):
+        return self._delegate('write', *args, **kwargs)
+
+    def draw_batch(self, *args, **kwargs):
+        return self._delegate('draw_batch', *args, **kwargs)
+
+    @contextmanager
+    def tint(self, *args, **kwargs):
+        if self.key is None:
+            yield
+        else:
+            with self.app.resources[self.key].tint(*args, **kwargs):
+                yield
+
+    def close(self):
+        pass
+
+
+class LoadBatch(object):
+    def __init__(self, total, progress=None):
+        self.total = total
+        self.done = 0
+        self.progress = progress
+
+    def advance(self):
+        self.done += 1
+        if self.progress is not None:
+            self.progress(self.done, self.total)
+
+
+class AsyncLoader(object):
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, app, workers=2, budget=0.004):
+        self.app = app
+        self.workers = workers
+        self.freq = sdl2.SDL_GetPerformanceFrequency()
+        self.budget = int(budget * self.freq)
+        self._executor = None
+        self._closed = False
+        self._decoding = set()
+        # NOTE: filled by the worker threads, emptied by the render thread
+        self._decoded = collections.deque()
+        self._wake_event = sdl2.SDL_RegisterEvents(1)
+        self.app.register_event_handler(self._wake_event, self._wake)
+
+    @property
+    def pending(self):
+        return len(self._decoding) + len(self._decoded)
+
+    @property
+    def busy(self):
+        return bool(self._decoded)
+
+    def _wake(self, event):
+        pass
+
+    def load(self, key, filename, placeholder=None, batch=None, hint=None):
+        future = Future()
+        try:
+            resource = resource_loader(
+                self.app, filename, lazy=True, hint=hint)
+        except Exception as exc:
+            future.set_exception(exc)
+            if batch is not None:
+                batch.advance()
+            return future
+        self.app.resources[key] = Placeholder(self.app, placeholder)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers)
+            self._closed = False
+        job = (key, resource, future, batch)
+        decoding = self._executor.submit(resource.decode)
+        self._decoding.add(decoding)
+        decoding.add_done_callback(
+            lambda decoding: self._decode_done(job, decoding))
+        return future
+
+    def _decode_done(self, job, decoding):
+        # NOTE: runs in the worker thread, the upload is left to process()
+        #       and the main loop is woken up in case it is idle
+        if self._closed:
+            self._discard(job, decoding)
+            return
+        self._decoded.append((job, decoding))
+        event = sdl2.SDL_Event()
+        event.type = self._wake_event
+        sdl2.SDL_PushEvent(event)
+
+    def process(self):
+        if not self._decoded:
+            return
+        start = sdl2.SDL_GetPerformanceCounter()
+        while self._decoded:
+            (key, resource, future, batch), decoding = \
+                self._decoded.popleft()
+            self._decoding.discard(decoding)
+            try:
+                resource.upload(decoding.result())
+            except Exception as exc:
+                self.logger.error("Can not load %r: %s", key, exc)
+                future.set_exception(exc)
+            else:
+                self.logger.info("Loaded %r: %s", key, resource.filename)
+                self.app.resources[key] = resource
+                future.set_result(resource)
+                self.app.touch()
+            if batch is not None:
+                batch.advance()
+            if sdl2.SDL_GetPerformanceCounter() - start >= self.budget:
+                break
+
+    def _discard(self, job, decoding):
+        # NOTE: the data decoded for a load that will never be uploaded
+        key, resource, future, batch = job
+        future.cancel()
+        if decoding.cancelled() or decoding.exception() is not None:
+            return
+        try:
+            resource.discard(decoding.result())
+        except Exception:
+            self.logger.exception("Can not free the data of %r", key)
+
+    def shutdown(self):
+        # NOTE: the decodings that are running can not be cancelled, their
+        #       data is freed as soon as they are done
+        self._closed = True
+        for decoding in list(self._decoding):
+            decoding.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while self._decoded:
+            self._discard(*self._decoded.popleft())
+        self._decoding.clear()
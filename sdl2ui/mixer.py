@@ -1,3 +1,4 @@
+import collections
 import logging
 import re
 import sdl2
@@ -23,54 +24,315 @@ class Mixer(sdl2ui.Component):
         if status != 0:
             raise Exception(
                 "can't open mixer: %s" % sdlmixer.Mix_GetError().decode())
+        self.closed = False
+        # NOTE: every SDL_mixer channel is a voice of the pool, a voice is
+        #       the playing Channel component and the serial of its play
+        self.pool_size = sdlmixer.Mix_AllocateChannels(
+            self.props.get('pool_size', 16))
+        self.voices = [None] * self.pool_size
+        self._serials = [0] * self.pool_size
+        self._serial = 0
+        # NOTE: maximum number of voices playing the same resource, by key
+        self.limits = dict(self.props.get('limits', {}))
+        self.default_limit = self.props.get('limit')
+        self._finished_event = sdl2.SDL_RegisterEvents(1)
+        self.app.register_event_handler(self._finished_event, self._reclaim)
+        self._c_finished = sdlmixer.channel_finished(self._channel_finished)
+        sdlmixer.Mix_ChannelFinished(self._c_finished)
+        # NOTE: key of the music playing and the ones queued after it as
+        #       (resource key, loops, fade in time)
+        self.music = None
+        self.music_queue = collections.deque()
+        self._music_event = sdl2.SDL_RegisterEvents(1)
+        self.app.register_event_handler(
+            self._music_event, self._music_finished)
+        self._c_music_finished = sdlmixer.music_finished(
+            self._push_music_finished)
+        sdlmixer.Mix_HookMusicFinished(self._c_music_finished)
         self.app.register_event_handler(sdl2.SDL_QUIT, self.quit)
 
     def quit(self, event):
+        if self.closed:
+            return
+        self.closed = True
         self.logger.info("Closing mixer...")
+        sdlmixer.Mix_ChannelFinished(sdlmixer.channel_finished())
+        sdlmixer.Mix_HookMusicFinished(sdlmixer.music_finished())
         sdlmixer.Mix_HaltChannel(-1)
+        for slot in range(self.pool_size):
+            self._release(slot)
+        # NOTE: the channels that never played hold their sample too
+        for channel in list(self.components):
+            if isinstance(channel, Channel):
+                self._discard(channel)
+        sdlmixer.Mix_HaltMusic()
+        self.music_queue.clear()
+        self._release_music()
         sdlmixer.Mix_CloseAudio()
 
-    def open(self, resource, loops=0):
-        return self.add_component(Channel,
-            audio=self.app.resources[resource],
-            loops=loops)
+    def play_music(self, resource, loops=-1, fade_in=0):
+        # NOTE: replaces the music playing and the queue, fade_in is in
+        #       milliseconds
+        self.music_queue.clear()
+        self.music_queue.append((resource, loops, fade_in))
+        if self.music is None:
+            self._next_music()
+        else:
+            sdlmixer.Mix_HaltMusic()
+
+    def queue_music(self, resource, loops=0, fade_in=0):
+        # NOTE: played when the previous music finishes. It is not gapless,
+        #       the next music is started by the main loop once it handles
+        #       the music finished event, after at least a frame of silence.
+        self.music_queue.append((resource, loops, fade_in))
+        if self.music is None:
+            self._next_music()
+
+    def crossfade(self, resource, duration=1000, loops=-1):
+        # NOTE: SDL_mixer streams a single music, the current one fades out
+        #       before the next one fades in
+        self.music_queue.clear()
+        self.music_queue.append((resource, loops, duration // 2))
+        if self.music is None or not sdlmixer.Mix_PlayingMusic():
+            self._next_music()
+        elif not sdlmixer.Mix_FadeOutMusic(duration // 2):
+            sdlmixer.Mix_HaltMusic()
+
+    def stop_music(self, fade_out=0):
+        self.music_queue.clear()
+        if fade_out and sdlmixer.Mix_FadeOutMusic(fade_out):
+            return
+        sdlmixer.Mix_HaltMusic()
+
+    def _push_music_finished(self):
+        # NOTE: called by SDL_mixer in the audio thread where no SDL_mixer
+        #       function can be called, the next music is started by the
+        #       main loop
+        event = sdl2.SDL_Event()
+        event.type = self._music_event
+        sdl2.SDL_PushEvent(event)
+
+    def _music_finished(self, event):
+        if sdlmixer.Mix_PlayingMusic():
+            # NOTE: a music has been started in the meantime
+            return
+        self._release_music()
+        self._next_music()
+
+    def _release_music(self):
+        if self.music is not None:
+            self.app.resources.release(self.music, self)
+            self.music = None
+
+    def _next_music(self):
+        while self.music_queue:
+            resource, loops, fade_in = self.music_queue.popleft()
+            music = self.app.resources.acquire(resource, self)
+            if sdlmixer.Mix_FadeInMusic(music.music, loops, fade_in) == 0:
+                self.music = resource
+                return
+            self.logger.warning(
+                "Can not play music %r: %s",
+                resource, sdlmixer.Mix_GetError().decode())
+            self.app.resources.release(resource, self)
+
+    def open(self, resource, loops=0, priority=0):
+        audio = self.app.resources[resource]
+        if not isinstance(audio, Audio):
+            raise TypeError(
+                "can't play %r in a channel, it is not a sample: %s "
+                "(use play_music() for a music)"
+                % (resource, type(audio).__name__))
+        channel = self.add_component(Channel,
+            audio=audio,
+            resource=resource,
+            loops=loops,
+            priority=priority)
+        # NOTE: the sample must not be evicted while the channel exists
+        self.app.resources.acquire(resource, channel)
+        return channel
+
+    def _channel_finished(self, slot):
+        # NOTE: called by SDL_mixer in the audio thread or in Mix_HaltChannel,
+        #       the serial tells the voice that finished from a new voice
+        #       that took the slot in the meantime
+        event = sdl2.SDL_Event()
+        event.type = self._finished_event
+        event.user.code = slot
+        event.user.data1 = self._serials[slot]
+        sdl2.SDL_PushEvent(event)
+
+    def _reclaim(self, event):
+        slot = event.user.code
+        if (0 <= slot < self.pool_size and
+                self._serials[slot] == (event.user.data1 or 0)):
+            self._release(slot)
+
+    def _release(self, slot):
+        channel = self.voices[slot]
+        if channel is None:
+            return
+        self.voices[slot] = None
+        self._discard(channel)
+
+    def _discard(self, channel):
+        channel.channel = None
+        channel.finished = True
+        channel.disable()
+        if channel in self.components:
+            self.components.remove(channel)
+        self.app.resources.release(channel.props['resource'], channel)
+
+    def _victim(self, channel):
+        # NOTE: the oldest voice of the same sound when its limit is reached,
+        #       a free slot, or the oldest voice of the lowest priority that
+        #       is not above the priority of the channel. A sound with a limit
+        #       of 0 is never played.
+        resource = channel.props['resource']
+        limit = self.limits.get(resource, self.default_limit)
+        if limit is not None:
+            if limit <= 0:
+                return None
+            same = [
+                slot for slot, voice in enumerate(self.voices)
+                if voice is not None and voice.props['resource'] == resource]
+            if same and len(same) >= limit:
+                return min(same, key=self._serials.__getitem__)
+        if None in self.voices:
+            return self.voices.index(None)
+        priority = channel.props.get('priority', 0)
+        candidates = [
+            slot for slot, voice in enumerate(self.voices)
+            if voice.props.get('priority', 0) <= priority]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda slot: (
+            self.voices[slot].props.get('priority', 0), self._serials[slot]))
+
+    def play(self, channel):
+        slot = self._victim(channel)
+        if slot is None:
+            self.logger.debug("No voice available for %r", channel)
+            return None
+        if self.voices[slot] is not None:
+            self.logger.debug("Voice %d stolen", slot)
+            sdlmixer.Mix_HaltChannel(slot)
+            self._release(slot)
+        self._serial += 1
+        self._serials[slot] = self._serial
+        if sdlmixer.Mix_PlayChannel(
+                slot, channel.props['audio'].sample,
+                channel.props.get('loops', 0)) == -1:
+            self.logger.warning(
+                "Can not play %r: %s", channel.props['resource'],
+                sdlmixer.Mix_GetError().decode())
+            return None
+        self.voices[slot] = channel
+        return slot
 
 
 class Channel(sdl2ui.Component):
     def init(self):
         self.channel = None
+        self.finished = False
 
     def halt(self):
-        sdlmixer.Mix_HaltChannel(self.channel)
+        if self.channel is not None:
+            sdlmixer.Mix_HaltChannel(self.channel)
 
     def deactivate(self):
-        sdlmixer.Mix_Pause(self.channel)
+        if self.channel is not None:
+            sdlmixer.Mix_Pause(self.channel)
 
     def activate(self):
+        if self.finished:
+            return
         if self.channel is None:
-            self.channel = sdlmixer.Mix_PlayChannel(
-                -1, self.props['audio'].sample, self.props.get('loops', 0))
+            self.channel = self.parent.play(self)
+            if self.channel is None:
+                self.parent._discard(self)
+                return
         sdlmixer.Mix_Resume(self.channel)
 
     def get_volume(self):
+        if self.channel is None:
+            return 0
         return sdlmixer.Mix_Volume(self.channel, -1)
 
     def set_volume(self, value):
-        sdlmixer.Mix_Volume(self.channel, int(value))
+        if self.channel is not None:
+            sdlmixer.Mix_Volume(self.channel, int(value))
 
     volume = property(get_volume, set_volume)
 
 
 class Audio(sdl2ui.resource.BaseResource):
     regex = re.compile(r"^.*\.(wav|flac|ogg|mod|mid|mp3)$")
+    hint = 'sample'
+    pool = 'samples'
 
-    def load(self):
-        self.sample = sdlmixer.Mix_LoadWAV(self.filepath.encode())
-        if not self.sample:
+    @classmethod
+    def create(cls, app, filename, lazy=False):
+        # NOTE: when the app has a music_threshold (in bytes), the files
+        #       above it are streamed as Music instead of being decoded in
+        #       memory, they can only be played with Mixer.play_music()
+        threshold = app.props.get('music_threshold')
+        if threshold is not None:
+            resource = cls(app, filename, lazy=True)
+            if resource.file_size >= threshold:
+                return Music(app, filename, lazy=lazy)
+            if not lazy:
+                resource.load()
+            return resource
+        return cls(app, filename, lazy=lazy)
+
+    def decode(self):
+        sample = sdlmixer.Mix_LoadWAV_RW(self.open_rw(), 1)
+        if not sample:
             raise ValueError(
                 "can't load resource %r: %s"
                 % (self.filename, sdlmixer.Mix_GetError().decode()))
+        return sample
+
+    def upload(self, sample):
+        self.sample = sample
+
+    def discard(self, sample):
+        sdlmixer.Mix_FreeChunk(sample)
+
+    @property
+    def size(self):
+        if not getattr(self, 'sample', None):
+            return 0
+        return self.sample.contents.alen
 
     def close(self):
         if getattr(self, 'sample', None):
             sdlmixer.Mix_FreeChunk(self.sample)
+            self.sample = None
+
+
+class Music(sdl2ui.resource.BaseResource):
+    regex = None
+    hint = 'music'
+    # NOTE: only the decoder state is in memory, the file is streamed
+    evictable = False
+
+    def decode(self):
+        music = sdlmixer.Mix_LoadMUS_RW(self.open_rw(), 1)
+        if not music:
+            raise ValueError(
+                "can't load resource %r: %s"
+                % (self.filename, sdlmixer.Mix_GetError().decode()))
+        return music
+
+    def upload(self, music):
+        self.music = music
+
+    def discard(self, music):
+        sdlmixer.Mix_FreeMusic(music)
+
+    def close(self):
+        if getattr(self, 'music', None):
+            sdlmixer.Mix_FreeMusic(self.music)
+            self.music = None
@@ -0,0 +1,86 @@
+import collections
+import math
+import sdl2
+
+
+class FramePacer(object):
+    def __init__(self, fps=60, vsync=False, spin=0.002, window=120,
+                 max_skip=4):
+        self.freq = sdl2.SDL_GetPerformanceFrequency()
+        self.period = self.freq / fps
+        self.vsync = vsync
+        self.spin = spin * self.freq
+        self.max_skip = max_skip
+        self.frame_times = collections.deque(maxlen=window)
+        self.frames = 0
+        self.dropped = 0
+        self.reset()
+
+    def reset(self):
+        now = sdl2.SDL_GetPerformanceCounter()
+        self._last = now
+        self._skipped = 0
+        self.deadline = now + self.period
+        self.late = False
+
+    def skip_render(self):
+        # NOTE: when the previous frame overran its deadline we skip the
+        #       rendering of this one to catch up, but never more than
+        #       max_skip frames in a row
+        if self.late and self._skipped < self.max_skip:
+            self._skipped += 1
+            return True
+        self._skipped = 0
+        return False
+
+    def wait(self, presented=False):
+        if self.vsync and presented:
+            # NOTE: SDL_RenderPresent() already blocked until the vertical
+            #       blank, use it as the new time reference
+            now = sdl2.SDL_GetPerformanceCounter()
+            self.deadline = now
+        else:
+            self._sleep_until(self.deadline)
+            now = sdl2.SDL_GetPerformanceCounter()
+        self.frame_times.append((now - self._last) / self.freq)
+        self._last = now
+        self.frames += 1
+        overrun = now - self.deadline
+        if overrun >= self.period:
+            # NOTE: we are late by at least a whole frame, the missed frames
+            #       are dropped and the next deadline is realigned instead of
+            #       trying to catch up
+            missed = int(overrun // self.period)
+            self.dropped += missed
+            self.deadline += (missed + 1) * self.period
+            self.late = True
+        else:
+            self.deadline += self.period
+            self.late = False
+
+    def _sleep_until(self, deadline):
+        remaining = deadline - sdl2.SDL_GetPerformanceCounter()
+        if remaining > self.spin:
+            delay = int((remaining - self.spin) * 1000 / self.freq)
+            if delay > 0:
+                sdl2.SDL_Delay(delay)
+        while sdl2.SDL_GetPerformanceCounter() < deadline:
+            pass
+
+    def stats(self):
+        times = list(self.frame_times)
+        if not times:
+            return None
+        mean = sum(times) / len(times)
+        variance = sum((x - mean) ** 2 for x in times) / len(times)
+        return {
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'target': self.period / self.freq,
+            'mean': mean,
+            'variance': variance,
+            'stddev': math.sqrt(variance),
+            'min': min(times),
+            'max': max(times),
+            'fps': 1 / mean if mean else 0.0,
+        }
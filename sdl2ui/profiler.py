@@ -0,0 +1,192 @@
+import json
+import sdl2
+
+from sdl2ui import call_or
+
+
+PHASES = (
+    'update', 'events', 'timers', 'loader', 'peek', 'render', 'wait', 'idle')
+
+
+def _percentile(values, percent):
+    # NOTE: values must be sorted, nearest rank
+    if not values:
+        return 0.0
+    rank = int(round(percent / 100 * (len(values) - 1)))
+    return values[rank]
+
+
+class Profiler(object):
+    # NOTE: the events are kept in a ring buffer of parallel lists, an event
+    #       is (name, category, start, duration, frame) with start and
+    #       duration in performance counter ticks
+    def __init__(self, app, capacity=8192):
+        self.app = app
+        self.capacity = capacity
+        self.freq = sdl2.SDL_GetPerformanceFrequency()
+        self.enabled = False
+        self.frame = 0
+        self._origin = sdl2.SDL_GetPerformanceCounter()
+        self._frame_start = 0
+        self._mark = 0
+        self.clear()
+
+    def clear(self):
+        self._names = [None] * self.capacity
+        self._categories = [None] * self.capacity
+        self._starts = [0] * self.capacity
+        self._durations = [0] * self.capacity
+        self._frames = [0] * self.capacity
+        self._index = 0
+        self._count = 0
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._frame_start = self._mark = sdl2.SDL_GetPerformanceCounter()
+        # NOTE: the lifecycle calls are wrapped when the dispatch lists are
+        #       rebuilt
+        self.app._dispatch_generation = None
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.app._dispatch_generation = None
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def record(self, name, category, start, duration):
+        i = self._index
+        self._names[i] = name
+        self._categories[i] = category
+        self._starts[i] = start
+        self._durations[i] = duration
+        self._frames[i] = self.frame
+        self._index = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = self._mark = sdl2.SDL_GetPerformanceCounter()
+
+    def mark(self, phase):
+        # NOTE: records the time elapsed since the previous mark as phase
+        if not self.enabled:
+            return
+        now = sdl2.SDL_GetPerformanceCounter()
+        self.record(phase, 'phase', self._mark, now - self._mark)
+        self._mark = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.record(
+            'frame', 'frame', self._frame_start,
+            self._mark - self._frame_start)
+        self.frame += 1
+
+    def wrap(self, name, category, function):
+        counter = sdl2.SDL_GetPerformanceCounter
+        record = self.record
+
+        def wrapper(*args, **kwargs):
+            start = counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, category, start, counter() - start)
+        return wrapper
+
+    def wrap_lifecycle(self, component, method, calls):
+        # NOTE: all the calls of a component are timed as one, the results
+        #       are only combined for peek()
+        def call_all():
+            for call in calls:
+                call()
+        name = "%s.%s" % (type(component).__name__, method)
+        if method == 'peek':
+            return [self.wrap(name, method, lambda: call_or(calls))]
+        return [self.wrap(name, method, call_all)]
+
+    def events(self):
+        start = (self._index - self._count) % self.capacity
+        for j in range(self._count):
+            i = (start + j) % self.capacity
+            yield (self._names[i], self._categories[i], self._starts[i],
+                   self._durations[i], self._frames[i])
+
+    def durations(self, name):
+        # NOTE: in seconds, sorted
+        return sorted(
+            duration / self.freq
+            for event_name, _, _, duration, _ in self.events()
+            if event_name == name)
+
+    def percentiles(self, name, percents=(50, 90, 99)):
+        durations = self.durations(name)
+        return [_percentile(durations, x) for x in percents]
+
+    def histogram(self, name, edges):
+        # NOTE: edges are increasing durations in seconds, the last bucket
+        #       counts everything above the last edge
+        counts = [0] * (len(edges) + 1)
+        for duration in self.durations(name):
+            for i, edge in enumerate(edges):
+                if duration < edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def summary(self):
+        durations = {}
+        for name, category, _, duration, _ in self.events():
+            durations.setdefault((name, category), []).append(
+                duration / self.freq)
+        result = {}
+        for (name, category), values in durations.items():
+            values.sort()
+            result[name] = {
+                'category': category,
+                'count': len(values),
+                'mean': sum(values) / len(values),
+                'p50': _percentile(values, 50),
+                'p90': _percentile(values, 90),
+                'p99': _percentile(values, 99),
+                'max': values[-1],
+            }
+        return result
+
+    def trace_events(self):
+        scale = 1000000 / self.freq
+        return [
+            {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start - self._origin) * scale,
+                'dur': duration * scale,
+                'pid': 0,
+                'tid': 0,
+                'args': {'frame': frame},
+            }
+            for name, category, start, duration, frame in self.events()
+        ]
+
+    def export_trace(self, path):
+        # NOTE: Chrome trace event format, open it in chrome://tracing or
+        #       https://ui.perfetto.dev
+        with open(path, 'w') as fileobj:
+            json.dump({
+                'traceEvents': self.trace_events(),
+                'displayTimeUnit': 'ms',
+            }, fileobj)
@@ -1,13 +1,13 @@
-from __future__ import division
-
 import __main__
 from contextlib import contextmanager
+import logging
 import os
 import re
 import sdl2
-import six
 
 import sdl2ui
+from sdl2ui.bundle import Bundle
+from sdl2ui.cache import LRUCache
 
 
 PATH = ['.']
@@ -16,9 +16,70 @@ if hasattr(__main__, '__file__'):
 PATH.append(os.path.join(os.path.dirname(sdl2ui.__file__), 'data'))
 
 
+BUNDLES = []
+
+
 resource_classes = []
 
 
+# NOTE: listing of every directory searched so far, keyed by PATH so the
+#       index is dropped when PATH is modified
+_listings = {}
+_listings_path = None
+
+
+def _listing(directory):
+    global _listings_path
+    if _listings_path != PATH:
+        _listings.clear()
+        _listings_path = list(PATH)
+    try:
+        return _listings[directory]
+    except KeyError:
+        try:
+            listing = frozenset(os.listdir(directory))
+        except OSError:
+            listing = frozenset()
+        _listings[directory] = listing
+        return listing
+
+
+def find(filename):
+    directory, basename = os.path.split(filename)
+    for path in PATH:
+        if basename in _listing(os.path.join(path, directory)):
+            return os.path.join(path, filename)
+    # NOTE: the file might have been created after the directory has been
+    #       indexed
+    for path in PATH:
+        filepath = os.path.join(path, filename)
+        if os.path.exists(filepath):
+            _listings.pop(os.path.join(path, directory), None)
+            return filepath
+    else:
+        raise ValueError(
+            "can not find resource %r in paths: %s"
+            % (filename, PATH))
+
+
+def find_bundle(filename):
+    for bundle in BUNDLES:
+        if filename in bundle:
+            return bundle
+    return None
+
+
+def mount(filename):
+    bundle = Bundle(find(filename))
+    BUNDLES.insert(0, bundle)
+    return bundle
+
+
+def unmount(bundle):
+    BUNDLES.remove(bundle)
+    bundle.close()
+
+
 class ResourceMetaclass(type):
     def __new__(cls, name, bases, attrs):
         new_class = super(ResourceMetaclass, cls).__new__(cls, name, bases, attrs)
@@ -27,23 +88,65 @@ class ResourceMetaclass(type):
         return new_class
 
 
-@six.add_metaclass(ResourceMetaclass)
-class BaseResource(object):
-    def __init__(self, app, filename):
+class BaseResource(object, metaclass=ResourceMetaclass):
+    # NOTE: an evictable resource can be closed by the resource manager when
+    #       the memory budget is exceeded and loaded again on its next use
+    evictable = True
+    # NOTE: name of the budget of the resource manager the resource also
+    #       counts against, if any
+    pool = None
+    # NOTE: name given to load_resource() to choose this class regardless of
+    #       the extension of the file
+    hint = None
+
+    @classmethod
+    def create(cls, app, filename, lazy=False):
+        return cls(app, filename, lazy=lazy)
+
+    def __init__(self, app, filename, lazy=False):
         self.app = app
         self.filename = filename
-        self.filepath = self.find(filename)
-        self.load()
+        self.bundle = find_bundle(filename)
+        if self.bundle is None:
+            self.filepath = self.find(filename)
+        else:
+            self.filepath = "%s:%s" % (self.bundle.path, filename)
+        if not lazy:
+            self.load()
+
+    def load(self):
+        self.upload(self.decode())
+
+    def decode(self):
+        # NOTE: may run in a worker thread, it must not use the renderer
+        return None
+
+    def upload(self, data):
+        pass
+
+    def discard(self, data):
+        # NOTE: frees what decode() returned when it is never uploaded
+        pass
 
     def find(self, filename):
-        for path in PATH:
-            filepath = os.path.join(path, filename)
-            if os.path.exists(filepath):
-                return filepath
+        return find(filename)
+
+    def open_rw(self):
+        if self.bundle is not None:
+            rw = self.bundle.open_rw(self.filename)
         else:
+            rw = sdl2.SDL_RWFromFile(self.filepath.encode(), b"rb")
+        if not rw:
             raise ValueError(
-                "can not find resource %r in paths: %s"
-                % (filename, PATH))
+                "can't open resource %r: %s"
+                % (self.filename, sdl2.SDL_GetError().decode()))
+        return rw
+
+    @property
+    def file_size(self):
+        if self.bundle is not None:
+            return self.bundle.size(self.filename)
+        return os.path.getsize(self.filepath)
 
     def draw(self, *args, **kwargs):
         raise NotImplementedError("object %s can not be draw" % type(self))
@@ -51,9 +154,16 @@ class BaseResource(object):
     def write(self, *args, **kwargs):
         raise NotImplementedError("object %s can not be write" % type(self))
 
+    def draw_batch(self, *args, **kwargs):
+        raise NotImplementedError("object %s can not be draw" % type(self))
+
     def tint(self, *args, **kwargs):
         raise NotImplementedError("object %s can not be tint" % type(self))
 
+    @property
+    def size(self):
+        return 0
+
     def close(self):
         pass
 
@@ -61,32 +171,63 @@ class BaseResource(object):
 class Image(BaseResource):
     regex = re.compile(r"^.*\.(bmp|png|gif|jpe?g|xbm|lbm|pcx|tga|tiff?)$")
 
-    def load(self):
-        self.font = None
-        self.font_w = None
-        self.font_h = None
+    def decode(self):
         image = self._get_image()
         if not image:
             raise ValueError(
                 "can't load resource %r: %s"
                 % (self.filename, sdl2.SDL_GetError()))
+        return image
+
+    def upload(self, image):
         try:
-            self.texture = \
-                sdl2.SDL_CreateTextureFromSurface(self.app.renderer, image)
-            self.rect = sdl2.SDL_Rect(0, 0, image.contents.w, image.contents.h)
+            self._set_texture(
+                sdl2.SDL_CreateTextureFromSurface(self.app.renderer, image),
+                sdl2.SDL_Rect(0, 0, image.contents.w, image.contents.h))
         finally:
             sdl2.SDL_FreeSurface(image)
 
+    def discard(self, image):
+        sdl2.SDL_FreeSurface(image)
+
+    def _set_texture(self, texture, src):
+        # NOTE: src is the area of the texture holding the image, self.rect
+        #       is the default destination
+        # NOTE: a font survives the reload of its texture
+        mapping = getattr(self, 'font', None)
+        self.font = None
+        self.font_w = None
+        self.font_h = None
+        self.glyphs = {}
+        self.text_cache = LRUCache(
+            self.app.props.get('text_cache_size', 1024 * 1024),
+            self._destroy_text)
+        self._tint = None
+        self.texture = texture
+        self.src = src
+        self.rect = sdl2.SDL_Rect(0, 0, src.w, src.h)
+        if mapping is not None:
+            self.make_font(mapping)
+
+    @property
+    def size(self):
+        if not getattr(self, 'texture', None):
+            return 0
+        return self.src.w * self.src.h * 4
+
     def close(self):
+        if getattr(self, 'text_cache', None):
+            self.text_cache.clear()
         if getattr(self, 'texture', None):
-            sdl2.SDL_DestroyTexture(self.texture)
+            self.app.destroy_texture(self.texture)
+            self.texture = None
 
     def _get_image(self):
         if self.filename.lower().endswith('.bmp'):
-            return sdl2.SDL_LoadBMP(self.filepath.encode())
+            return sdl2.SDL_LoadBMP_RW(self.open_rw(), 1)
         else:
             from sdl2 import sdlimage
-            return sdlimage.IMG_Load(self.filepath.encode())
+            return sdlimage.IMG_Load_RW(self.open_rw(), 1)
 
     def draw(self, **kwargs):
         if 'rect' in kwargs:
@@ -99,38 +240,287 @@ class Image(BaseResource):
                 kwargs.get('h', self.rect.h))
         else:
             dest = self.rect
-        sdl2.SDL_RenderCopy(self.app.renderer, self.texture, self.rect, dest)
+        self.app.copy(self.texture, self.src, dest, self._tint)
+
+    def draw_batch(self, positions, sources=None, sizes=None, colors=None,
+                   angles=None):
+        # NOTE: sources are (x, y, w, h) rects relative to the image, sizes
+        #       default to the size of the sources and angles are in degrees
+        args = (positions, sources, sizes, colors, angles)
+        if self.app.recording is None:
+            self.app.sprite_batch.draw(self, *args)
+        else:
+            self.app.recording.call(self._draw_batch, self._tint, args)
+
+    def _draw_batch(self, tint, args):
+        if tint is None:
+            self.app.sprite_batch.draw(self, *args)
+        else:
+            with self.tint(*tint):
+                self.app.sprite_batch.draw(self, *args)
 
     def write(self, x=0, y=0, text=""):
         assert self.font is not None, "the resource is not a font"
-        src = sdl2.SDL_Rect(0, 0, self.font_w, self.font_h)
+        key = (text, self._tint)
+        cached = self.text_cache.get(key)
+        if cached is None:
+            cached = self._render_text(text)
+            if cached is None:
+                self._blit_glyphs(x, y, text)
+                return
+            texture, rect = cached
+            if not self.text_cache.put(key, cached, rect.w * rect.h * 4):
+                # NOTE: the text is too large for the cache, draw it once and
+                #       forget about it
+                self.app.copy(
+                    texture, rect, sdl2.SDL_Rect(x, y, rect.w, rect.h))
+                self.app.destroy_texture(texture)
+                return
+        texture, rect = cached
+        self.app.copy(texture, rect, sdl2.SDL_Rect(x, y, rect.w, rect.h))
+
+    def _blit_glyphs(self, x, y, text):
+        copy = self.app.copy
+        texture = self.texture
+        tint = self._tint
+        glyphs = self.glyphs
         dest = sdl2.SDL_Rect(x, y, self.font_w, self.font_h)
         for c in text:
-            try:
-                src.x = self.font.index(c) * self.font_w
-            except ValueError:
-                pass
-            else:
-                sdl2.SDL_RenderCopy(self.app.renderer, self.texture, src, dest)
+            src = glyphs.get(c)
+            if src is not None:
+                copy(texture, src, dest, tint)
                 dest.x += self.font_w
 
+    def _render_text(self, text):
+        if self.text_cache.budget <= 0:
+            return None
+        w = sum(self.font_w for c in text if c in self.glyphs)
+        if w == 0:
+            return None
+        texture = self.app.create_target_texture(w, self.font_h)
+        if not texture:
+            return None
+        # NOTE: the tint is only remembered while a display list is recorded
+        #       but the cached text needs it now
+        tinted = self.app.recording is not None and self._tint is not None
+        if tinted:
+            sdl2.SDL_SetTextureColorMod(self.texture, *self._tint[:3])
+        try:
+            with self.app.render_target(texture):
+                self._blit_glyphs(0, 0, text)
+        finally:
+            if tinted:
+                sdl2.SDL_SetTextureColorMod(self.texture, 0xff, 0xff, 0xff)
+        return texture, sdl2.SDL_Rect(0, 0, w, self.font_h)
+
+    def _destroy_text(self, key, value):
+        self.app.destroy_cached_texture(value[0])
+
+    def _reset_text_cache(self, event):
+        self.text_cache.clear()
+
     @contextmanager
     def tint(self, r, g, b, a):
-        sdl2.SDL_SetTextureColorMod(self.texture, r, g, b, a)
+        previous = self._tint
+        self._tint = (r, g, b, a)
+        # NOTE: while a display list is recorded the color modulation is left
+        #       to the replay
+        recording = self.app.recording is not None
+        if not recording:
+            sdl2.SDL_SetTextureColorMod(self.texture, r, g, b, a)
         try:
             yield
         finally:
-            sdl2.SDL_SetTextureColorMod(self.texture, 0xff, 0xff, 0xff, 0xff)
+            self._tint = previous
+            if not recording:
+                sdl2.SDL_SetTextureColorMod(
+                    self.texture, *(previous or (0xff, 0xff, 0xff, 0xff)))
 
     def make_font(self, mapping):
+        if not getattr(self, '_reset_handler', False):
+            self.app.register_event_handler(
+                sdl2.SDL_RENDER_TARGETS_RESET, self._reset_text_cache)
+            self._reset_handler = True
         self.font = mapping
         self.font_w = int(self.rect.w / len(mapping))
         self.font_h = self.rect.h
+        # NOTE: a mapping may contain the same character twice, the first
+        #       occurrence wins like it did with str.index()
+        self.glyphs = {}
+        for i, c in enumerate(mapping):
+            self.glyphs.setdefault(c, sdl2.SDL_Rect(
+                self.src.x + i * self.font_w, self.src.y,
+                self.font_w, self.font_h))
+        self.text_cache.clear()
 
 
-def load(app, filename):
+def load(app, filename, lazy=False, hint=None):
     for resource_class in resource_classes:
-        if resource_class.regex.match(filename):
-            return resource_class(app, filename)
-    else:
-        raise ValueError("can't identify resource type of: %s" % filename)
+        if hint is not None:
+            if resource_class.hint == hint:
+                return resource_class(app, filename, lazy=lazy)
+        elif resource_class.regex and resource_class.regex.match(filename):
+            return resource_class.create(app, filename, lazy=lazy)
+    if hint is not None:
+        raise ValueError("unknown resource hint %r for: %s" % (hint, filename))
+    raise ValueError("can't identify resource type of: %s" % filename)
+
+
+class ResourceManager(object):
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, app, budget=None, budgets=None):
+        self.app = app
+        # NOTE: the loaded resources by least recent use with their size for
+        #       the budget of all the resources and for the budgets of the
+        #       pools, by pool name. A pool only evicts its own resources.
+        self._lru = LRUCache(budget, self._evicted_entry, self._pinned)
+        self._pools = dict(
+            (pool, LRUCache(x, self._evicted_entry, self._pinned))
+            for pool, x in (budgets or {}).items() if x is not None)
+        self._resources = {}
+        self._filenames = {}
+        self._hints = {}
+        self._evicted = set()
+        self._references = {}
+
+    @property
+    def budget(self):
+        return self._lru.budget
+
+    @property
+    def size(self):
+        return self._lru.size
+
+    def pool_size(self, pool):
+        return self._pools[pool].size if pool in self._pools else 0
+
+    def __contains__(self, key):
+        return key in self._resources or key in self._filenames
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return list(self._resources.keys()) + [
+            key for key in self._filenames if key not in self._resources]
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self[key]
+
+    def __getitem__(self, key):
+        resource = self._resources.get(key)
+        if resource is None:
+            if key not in self._filenames:
+                raise KeyError(key)
+            self.logger.info(
+                "Loading %r: %s", key, self._filenames[key])
+            self[key] = resource = load(
+                self.app, self._filenames[key], hint=self._hints.get(key))
+        elif key in self._evicted:
+            self.logger.debug("Reloading %r", key)
+            resource.load()
+            self._evicted.discard(key)
+            self._track(key, resource)
+        else:
+            for cache in self._caches():
+                cache.get(key)
+        return resource
+
+    def __setitem__(self, key, resource):
+        previous = self._resources.get(key)
+        if previous is not None and previous is not resource:
+            # NOTE: an acquired resource may be in use, e.g. played by a
+            #       channel, only a placeholder can be replaced
+            if (self._references.get(key) and
+                    not getattr(previous, 'placeholder', False)):
+                raise ValueError(
+                    "can't replace resource %r while it is acquired" % key)
+            # NOTE: the previous resource may still be drawn by the retained
+            #       layers and the display lists
+            self.app.invalidate()
+            if key not in self._evicted:
+                previous.close()
+        self._untrack(key)
+        self._evicted.discard(key)
+        self._resources[key] = resource
+        self._track(key, resource)
+
+    def __delitem__(self, key):
+        self._untrack(key)
+        self._evicted.discard(key)
+        self._filenames.pop(key, None)
+        self._hints.pop(key, None)
+        del self._resources[key]
+
+    def register(self, key, filename, hint=None):
+        # NOTE: the resource will be loaded on its first use
+        self._filenames[key] = filename
+        self._hints[key] = hint
+
+    def _caches(self):
+        return [self._lru] + list(self._pools.values())
+
+    def _track(self, key, resource):
+        # NOTE: a resource larger than a budget is not counted in it, it is
+        #       never evicted
+        if not getattr(resource, 'evictable', False):
+            return
+        size = resource.size
+        pool = self._pools.get(getattr(resource, 'pool', None))
+        if pool is not None:
+            pool.put(key, resource, size)
+        self._lru.put(key, resource, size)
+
+    def _untrack(self, key):
+        for cache in self._caches():
+            cache.pop(key)
+
+    def _pinned(self, key, resource):
+        return bool(self._references.get(key))
+
+    def _shrink(self):
+        for cache in self._caches():
+            cache.shrink()
+
+    def _evicted_entry(self, key, resource):
+        self.logger.debug("Evicting %r", key)
+        self._untrack(key)
+        resource.close()
+        self._evicted.add(key)
+
+    def evict(self, key):
+        for cache in self._caches():
+            if key in cache:
+                cache.discard(key)
+                return
+
+    def acquire(self, key, owner):
+        self._references.setdefault(key, set()).add(owner)
+        return self[key]
+
+    def release(self, key, owner):
+        owners = self._references.get(key)
+        if owners is not None:
+            owners.discard(owner)
+            if not owners:
+                del self._references[key]
+        self._shrink()
+
+    def references(self, key):
+        return len(self._references.get(key, ()))
+
+    def close(self):
+        for key, resource in list(self._resources.items()):
+            if key not in self._evicted:
+                resource.close()
+        self._resources.clear()
+        for cache in self._caches():
+            for key in cache:
+                cache.pop(key)
+        self._evicted.clear()
@@ -0,0 +1,250 @@
+import collections
+import math
+
+import numpy
+import sdl2
+
+from sdl2ui.audio import AudioDevice, SAMPLE_TYPES
+
+
+class Sound(object):
+    # NOTE: the samples of a sound are converted once to float32 frames in
+    #       [-1, 1] shaped (frames, channels) and padded with silence for the
+    #       taps of the resampling filter
+    padding = 32
+
+    def __init__(self, samples, frequency):
+        samples = numpy.asarray(samples)
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 1)
+        if samples.shape[1] not in (1, 2):
+            raise ValueError(
+                "can't mix %d channels, only mono or stereo"
+                % samples.shape[1])
+        if samples.dtype.kind == 'f':
+            data = samples.astype(numpy.float32)
+        elif samples.dtype.kind == 'u':
+            half = 1 << (samples.dtype.itemsize * 8 - 1)
+            data = (samples.astype(numpy.float32) - half) / half
+        else:
+            data = samples.astype(numpy.float32) / (
+                1 << (samples.dtype.itemsize * 8 - 1))
+        self.frequency = frequency
+        self.frames, self.channels = data.shape
+        self.data = numpy.zeros(
+            (self.frames + 2 * self.padding, self.channels), numpy.float32)
+        self.data[self.padding:self.padding + self.frames] = data
+
+
+class Voice(object):
+    # NOTE: gain, pan and pitch are read by the audio thread at every
+    #       callback and can be changed from the main thread at any time,
+    #       position and finished are only written by the audio thread
+    def __init__(self, mixer, sound, gain=1.0, pan=0.0, pitch=1.0, loops=0):
+        self.mixer = mixer
+        self.sound = sound
+        self.gain = gain
+        self.pan = pan
+        self.pitch = pitch
+        self.loops = loops
+        self.position = 0.0
+        self.finished = False
+
+    def stop(self):
+        self.mixer._commands.append((self, False))
+
+
+class SoftwareMixer(AudioDevice):
+    # NOTE: the voices are mixed in float32 by the audio callback. The main
+    #       thread never touches the list of the voices playing, it appends
+    #       (voice, playing) commands to a deque which is drained at the
+    #       beginning of every callback.
+    sample_view = 'numpy'
+
+    def load(self):
+        if self.audio_spec.channels not in (1, 2):
+            raise ValueError(
+                "can't mix to %d channels, only mono or stereo"
+                % self.audio_spec.channels)
+        # NOTE: 'linear' or 'polyphase'
+        self.resampling = self.props.get('resampling', 'linear')
+        self.phases = self.props.get('phases', 32)
+        self.taps = self.props.get('taps', 16)
+        if self.taps > 2 * Sound.padding:
+            raise ValueError("can't use more than %d taps" % (
+                2 * Sound.padding))
+        dtype = numpy.dtype(SAMPLE_TYPES[self.audio_spec.format][1])
+        if dtype.kind == 'f':
+            self._scale, self._offset = 1.0, 0.0
+        else:
+            half = 1 << (dtype.itemsize * 8 - 1)
+            self._scale = half - 1
+            self._offset = half if dtype.kind == 'u' else 0
+        self.voices = []
+        self._commands = collections.deque()
+        self._banks = {}
+        self._buffers = None
+        self._pair = numpy.arange(2)
+        # NOTE: cost of the callbacks in seconds
+        self.callbacks = 0
+        self.callback_time = 0.0
+        self.callback_max = 0.0
+        self._callback_total = 0.0
+
+    def play(self, sound, gain=1.0, pan=0.0, pitch=1.0, loops=0):
+        # NOTE: loops is the number of extra plays, -1 loops forever
+        voice = Voice(self, sound, gain, pan, pitch, loops)
+        self._commands.append((voice, True))
+        return voice
+
+    def stop_all(self):
+        self._commands.append((None, False))
+
+    @property
+    def load_factor(self):
+        # NOTE: average share of the duration of a buffer spent mixing it
+        if not self.callbacks:
+            return 0.0
+        period = self.audio_spec.samples / self.audio_spec.freq
+        return self._callback_total / self.callbacks / period
+
+    def stats(self):
+        return {
+            'voices': len(self.voices),
+            'callbacks': self.callbacks,
+            'last': self.callback_time,
+            'mean': self._callback_total / self.callbacks
+            if self.callbacks else 0.0,
+            'max': self.callback_max,
+            'load': self.load_factor,
+        }
+
+    def _apply_commands(self):
+        commands = self._commands
+        while commands:
+            voice, playing = commands.popleft()
+            if voice is None:
+                for voice in self.voices:
+                    voice.finished = True
+                del self.voices[:]
+            elif playing:
+                if not voice.finished:
+                    self.voices.append(voice)
+            elif voice in self.voices:
+                self.voices.remove(voice)
+                voice.finished = True
+            else:
+                voice.finished = True
+
+    def _get_buffers(self, frames):
+        if self._buffers is None or len(self._buffers[0]) != frames:
+            self._buffers = (
+                numpy.zeros((frames, self.audio_spec.channels), numpy.float32),
+                numpy.arange(frames, dtype=numpy.float64),
+                numpy.arange(self.taps) - (self.taps // 2 - 1))
+        return self._buffers
+
+    def _filter_bank(self, cutoff):
+        # NOTE: windowed sinc, one row of taps per fractional position, the
+        #       cutoff is lowered when the sound is played faster than the
+        #       output frequency
+        key = round(cutoff, 2)
+        bank = self._banks.get(key)
+        if bank is None:
+            offsets = numpy.arange(self.taps) - (self.taps // 2 - 1)
+            fractions = numpy.arange(self.phases) / self.phases
+            x = offsets[None, :] - fractions[:, None]
+            window = (
+                0.42 + 0.5 * numpy.cos(2 * math.pi * x / self.taps) +
+                0.08 * numpy.cos(4 * math.pi * x / self.taps))
+            bank = numpy.sinc(x * key) * window
+            bank /= bank.sum(axis=1)[:, None]
+            bank = self._banks[key] = bank.astype(numpy.float32)
+        return bank
+
+    def _taps(self, voice, indexes, offsets):
+        # NOTE: the frames read around the positions, a looped sound reads
+        #       its beginning after its end instead of the padding
+        sound = voice.sound
+        taps = indexes[:, None] + offsets
+        if voice.loops != 0:
+            taps %= sound.frames
+        return taps + Sound.padding
+
+    def _resample(self, voice, positions, offsets):
+        sound = voice.sound
+        if voice.loops != 0:
+            positions = positions % sound.frames
+        indexes = positions.astype(numpy.intp)
+        fractions = positions - indexes
+        data = sound.data
+        if self.resampling == 'polyphase':
+            bank = self._filter_bank(min(
+                1.0, sound.frequency / self.audio_spec.freq / voice.pitch))
+            phases = (fractions * self.phases).astype(numpy.intp)
+            frames = data[self._taps(voice, indexes, offsets)]
+            return numpy.einsum(
+                'nt,ntc->nc', bank[phases], frames, dtype=numpy.float32)
+        taps = self._taps(voice, indexes, self._pair)
+        before = data[taps[:, 0]]
+        after = data[taps[:, 1]]
+        return before + (after - before) * fractions[:, None].astype(
+            numpy.float32)
+
+    def _mix(self, voice, output, ramp, offsets):
+        sound = voice.sound
+        frames = len(output)
+        step = sound.frequency / self.audio_spec.freq * voice.pitch
+        if voice.loops < 0:
+            length = frames
+        else:
+            total = sound.frames * (voice.loops + 1)
+            length = min(frames, max(
+                0, int(math.ceil((total - voice.position) / step))))
+        if length == 0:
+            return False
+        positions = voice.position + step * ramp[:length]
+        voice.position += step * length
+        if voice.loops < 0:
+            voice.position %= sound.frames
+        samples = self._resample(voice, positions, offsets)
+        pan = min(1.0, max(-1.0, voice.pan))
+        left = voice.gain * min(1.0, 1.0 - pan)
+        right = voice.gain * min(1.0, 1.0 + pan)
+        if output.shape[1] == 1:
+            if sound.channels == 2:
+                output[:length, 0] += (
+                    samples[:, 0] * left + samples[:, 1] * right) * 0.5
+            else:
+                output[:length, 0] += samples[:, 0] * voice.gain
+        else:
+            output[:length, 0] += samples[:, 0] * left
+            output[:length, 1] += samples[:, -1] * right
+        return length == frames
+
+    def fill(self, samples):
+        start = sdl2.SDL_GetPerformanceCounter()
+        self._apply_commands()
+        output, ramp, offsets = self._get_buffers(len(samples))
+        output.fill(0)
+        finished = [
+            voice for voice in self.voices
+            if not self._mix(voice, output, ramp, offsets)]
+        for voice in finished:
+            self.voices.remove(voice)
+            voice.finished = True
+        # NOTE: saturate instead of wrapping around
+        numpy.clip(output, -1.0, 1.0, out=output)
+        if self._scale != 1.0:
+            output *= self._scale
+            if self._offset:
+                output += self._offset
+            numpy.rint(output, out=output)
+        samples[...] = output
+        elapsed = (sdl2.SDL_GetPerformanceCounter() - start) / \
+            sdl2.SDL_GetPerformanceFrequency()
+        self.callbacks += 1
+        self.callback_time = elapsed
+        self._callback_total += elapsed
+        if elapsed > self.callback_max:
+            self.callback_max = elapsed
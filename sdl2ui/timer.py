@@ -0,0 +1,111 @@
+import heapq
+import itertools
+
+
+class Timer(object):
+    def __init__(self, queue, deadline, callback, interval=None):
+        assert interval is None or interval > 0, \
+            "a repeating timer needs a positive interval"
+        self.queue = queue
+        self.deadline = deadline
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+        self._queued = False
+
+    @property
+    def pending(self):
+        return self._queued and not self.cancelled
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        if self._queued:
+            self.queue._discard()
+
+
+class TimerQueue(object):
+    # NOTE: cancelled timers are left in the heap and dropped lazily when
+    #       they reach the top, the heap is compacted when they become the
+    #       majority
+    compact_threshold = 64
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._cancelled = 0
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def add(self, deadline, callback, interval=None):
+        timer = Timer(self, deadline, callback, interval)
+        self._push(timer)
+        return timer
+
+    def _push(self, timer):
+        timer._queued = True
+        heapq.heappush(self._heap, (timer.deadline, next(self._counter), timer))
+
+    def _pop(self):
+        _, _, timer = heapq.heappop(self._heap)
+        timer._queued = False
+        if timer.cancelled:
+            self._cancelled -= 1
+            return None
+        return timer
+
+    def _discard(self):
+        self._cancelled += 1
+        if (self._cancelled > self.compact_threshold and
+                self._cancelled * 2 > len(self._heap)):
+            self._compact()
+
+    def _compact(self):
+        heap = []
+        for entry in self._heap:
+            if entry[2].cancelled:
+                entry[2]._queued = False
+            else:
+                heap.append(entry)
+        heapq.heapify(heap)
+        self._heap = heap
+        self._cancelled = 0
+
+    def next_deadline(self):
+        while self._heap and self._heap[0][2].cancelled:
+            self._pop()
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def clear(self):
+        for _, _, timer in self._heap:
+            timer._queued = False
+        self._heap = []
+        self._cancelled = 0
+
+    def call(self, ticks):
+        heap = self._heap
+        if not heap or heap[0][0] > ticks:
+            return
+        # NOTE: collect the due timers first so timers added by the callbacks
+        #       are not fired during the same pass
+        due = []
+        while heap and heap[0][0] <= ticks:
+            timer = self._pop()
+            if timer is not None:
+                due.append(timer)
+            heap = self._heap
+        for timer in due:
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                missed = (ticks - timer.deadline) // timer.interval + 1
+                timer.deadline += missed * timer.interval
+                self._push(timer)
+            timer.callback()
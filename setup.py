@@ -16,7 +16,6 @@ VERSION_RE = re.compile(r'''__version__ = ['"]([0-9.]+)['"]''')
 
 requires = [
     'pysdl2 >= 0.9.3',
-    'six >= 1.10'
 ]
 
 
@@ -41,6 +40,7 @@ setup(
         'sdl2ui': ['data/*.png'],
     },
     install_requires=requires,
+    python_requires='>=3.6',
     setup_requires=['pytest-runner'],
     tests_require=['pytest'],
     license="MIT",
@@ -50,10 +50,8 @@ setup(
         'Natural Language :: English',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.6',
     ],
 )
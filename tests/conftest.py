@@ -0,0 +1,11 @@
+import pytest
+
+from sdl2ui.app import App
+
+
+@pytest.fixture
+def app():
+    app = App(width=64, height=48, headless=True)
+    yield app
+    app.quit()
+    app._clean_up()
@@ -0,0 +1,168 @@
+import bisect
+import types
+
+import pytest
+import sdl2
+
+import sdl2ui
+import sdl2ui.app
+
+
+def _without_key(function):
+    # NOTE: the bisect functions of Python < 3.10 have no key argument
+    def wrapper(a, x, lo=0, hi=None):
+        return function(a, x, lo, len(a) if hi is None else hi)
+    return wrapper
+
+
+@pytest.fixture(autouse=True)
+def bisect_without_key(monkeypatch):
+    monkeypatch.setattr(sdl2ui.app, 'bisect', types.SimpleNamespace(**dict(
+        (name, _without_key(getattr(bisect, name)))
+        for name in ('bisect', 'bisect_left', 'bisect_right', 'insort'))))
+
+
+class Node(sdl2ui.Component):
+    def init(self):
+        self.register_event_handler(sdl2.SDL_USEREVENT, self.user_event)
+        self.events = []
+
+    def peek(self):
+        return False
+
+    def render(self):
+        pass
+
+    def user_event(self, event):
+        self.events.append(event.type)
+
+
+class Plain(sdl2ui.Component):
+    pass
+
+
+def _depth_first(component):
+    if not component.active:
+        return []
+    result = [component]
+    for child in component.components:
+        result += _depth_first(child)
+    return result
+
+
+def _check_order(app):
+    app._update_active_components()
+    expected = _depth_first(app)
+    assert app.active_components == expected
+    assert len(app._active_list) == len(expected)
+    orders = [x._order for x in expected]
+    assert orders == sorted(set(orders))
+    assert app._event_index.get(sdl2.SDL_USEREVENT, []) == [
+        x for x in expected if sdl2.SDL_USEREVENT in x.event_handlers]
+    for event_type, subscribers in app._event_index.items():
+        assert app._event_orders[event_type] == [x._order for x in subscribers]
+    if app._dispatch_generation == sdl2ui.ComponentMetaclass.generation:
+        assert app._peek_orders == [x._order for x, _ in app._peek_calls]
+        assert app._render_orders == [x._order for x, _ in app._render_calls]
+        patched = (list(app._peek_calls), list(app._render_calls))
+        app._update_dispatch()
+        assert patched == (app._peek_calls, app._render_calls)
+    app._update_dispatch()
+    assert [x for x, _ in app._render_calls] == [
+        x for x in expected if sdl2ui.bind_lifecycle(x, 'render')]
+
+
+def _tree(app, parent, depth, width=3):
+    components = []
+    for i in range(width):
+        component = parent.add_component(Node if i % 2 == 0 else Plain)
+        component.enable()
+        components.append(component)
+        if depth > 1:
+            components += _tree(app, component, depth - 1, width)
+    return components
+
+
+def test_nested_enable_and_disable(app):
+    components = _tree(app, app, 3)
+    _check_order(app)
+    app._update_dispatch()
+    for component in components[::4]:
+        component.disable()
+        _check_order(app)
+    for component in reversed(components[::4]):
+        component.enable()
+        _check_order(app)
+
+
+def test_children_enabled_under_inactive_parent(app):
+    parent = app.add_component(Node)
+    children = [parent.add_component(Node) for i in range(3)]
+    for child in children[::2]:
+        child.enable()
+    _check_order(app)
+    assert app.active_components == [app]
+    parent.enable()
+    _check_order(app)
+    assert app.active_components == [app, parent, children[0], children[2]]
+    children[1].enable()
+    _check_order(app)
+    assert app.active_components == [app, parent] + children
+
+
+def test_re_enable_keeps_the_position(app):
+    components = _tree(app, app, 2)
+    _check_order(app)
+    app._update_dispatch()
+    for component in components:
+        component.disable()
+        _check_order(app)
+        component.enable()
+        _check_order(app)
+
+
+def test_relabel_keeps_the_order(app):
+    app._active_list.spacing = 1
+    components = _tree(app, app, 2)
+    _check_order(app)
+    app._update_dispatch()
+    for component in components[:4]:
+        child = component.add_component(Node)
+        child.enable()
+        _check_order(app)
+    assert app._active_list.relabels
+    for component in components:
+        component.toggle()
+        _check_order(app)
+
+
+def test_toggle_during_iteration(app):
+    components = _tree(app, app, 2)
+    _check_order(app)
+    app._update_dispatch()
+    first, last = components[0], components[-1]
+    toggled = [first, components[4], last]
+    added = []
+
+    def toggle(event):
+        for component in toggled:
+            component.toggle()
+        component = first.add_component(Node)
+        component.enable()
+        added.append(component)
+        last.register_event_handler(sdl2.SDL_USEREVENT + 1, toggle)
+    first.register_event_handler(sdl2.SDL_USEREVENT, toggle)
+    event = sdl2.SDL_Event()
+    event.type = sdl2.SDL_USEREVENT
+    app.poll(event)
+    # NOTE: the activations are applied after the dispatch
+    assert all(x.events for x in components if isinstance(x, Node))
+    _check_order(app)
+    assert not first.active and added[0] in first.components
+    assert app._event_index[sdl2.SDL_USEREVENT + 1] == []
+    app.poll(event)
+    assert len(added) == 1
+    toggle(event)
+    _check_order(app)
+    assert first._linked and added[0]._linked and added[1]._linked
+    assert app._event_index[sdl2.SDL_USEREVENT + 1] == [last]
@@ -0,0 +1,54 @@
+import os
+
+import sdl2
+
+import sdl2ui
+from sdl2ui.app import App
+
+
+def test_headless_does_not_leak_the_drivers():
+    environ = dict(os.environ)
+    app = App(width=32, height=32, headless=True)
+    try:
+        assert app.window
+        assert app.renderer
+        assert sdl2.SDL_GetCurrentVideoDriver() == b"dummy"
+    finally:
+        app.quit()
+        app._clean_up()
+    assert dict(os.environ) == environ
+    assert sdl2.SDL_GetHint(sdl2.SDL_HINT_VIDEODRIVER) in (
+        None, environ.get('SDL_VIDEODRIVER', '').encode() or None)
+
+
+class Layered(sdl2ui.Component):
+    retained = True
+
+    def render(self):
+        self.app.resources['font-6'].draw(x=0, y=0)
+
+
+def test_layers_are_released_above_the_budget():
+    size = 32 * 32 * 4
+    app = App(width=32, height=32, headless=True, retained=True,
+              layer_budget=2 * size)
+    try:
+        components = [app.add_component(Layered) for i in range(3)]
+        for component in components:
+            component.enable()
+        app._update_active_components()
+        app._render_components()
+        # NOTE: the layer of the first component is the least recently used
+        assert [x._layer is not None for x in components] == [
+            False, True, True]
+        assert app.layers_size == 2 * size
+        components[1].disable()
+        app._update_active_components()
+        assert components[1]._layer is None
+        assert app.layers_size == size
+        app._render_components()
+        assert components[0]._layer is not None
+        assert app.layers_size == 2 * size
+    finally:
+        app.quit()
+        app._clean_up()
@@ -0,0 +1,92 @@
+import pytest
+import sdl2
+
+from sdl2ui import atlas
+from sdl2ui.atlas import SkylinePacker, build_atlas
+
+
+def _overlap(a, b):
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+def test_packer_places_bottom_left():
+    packer = SkylinePacker(100, 100, padding=0)
+    assert packer.insert(40, 20) == (0, 0)
+    assert packer.insert(40, 30) == (40, 0)
+    assert packer.insert(20, 10) == (80, 0)
+    # NOTE: the lowest skyline is the top of the third rectangle
+    assert packer.insert(20, 10) == (80, 10)
+    assert packer.insert(40, 10) == (0, 20)
+    assert (packer.used_w, packer.used_h) == (100, 30)
+
+
+def test_packer_rectangles_do_not_overlap():
+    packer = SkylinePacker(128, 128, padding=1)
+    placed = []
+    sizes = [(17, 9), (30, 12), (5, 40), (22, 22), (64, 8), (9, 9)] * 4
+    for w, h in sizes:
+        position = packer.insert(w, h)
+        assert position is not None
+        x, y = position
+        assert x + w <= 128 and y + h <= 128
+        rect = (x, y, w + 1, h + 1)
+        assert not any(_overlap(rect, other) for other in placed)
+        placed.append(rect)
+
+
+def test_packer_overflow():
+    packer = SkylinePacker(32, 32, padding=0)
+    assert packer.insert(33, 1) is None
+    assert packer.insert(1, 33) is None
+    assert packer.insert(32, 20) == (0, 0)
+    assert packer.insert(32, 13) is None
+    assert packer.insert(32, 12) == (0, 20)
+    assert packer.insert(1, 1) is None
+
+
+def test_packer_padding_is_clamped_at_the_border():
+    packer = SkylinePacker(16, 16, padding=2)
+    assert packer.insert(16, 16) == (0, 0)
+    assert packer.insert(1, 1) is None
+
+
+def test_build_atlas(app):
+    result = build_atlas(app, [('a', 'font-6.png'), ('b', 'font-6.png')])
+    assert len(result.pages) == 1
+    assert result.pages[0].texture
+    a = app.resources['a']
+    b = app.resources['b']
+    assert a.texture == b.texture
+    assert (a.src.x, a.src.y) != (b.src.x, b.src.y)
+
+
+def test_build_atlas_page_size_is_capped(app, monkeypatch):
+    monkeypatch.setattr(atlas, '_max_texture_size', lambda app, size: 8)
+    with pytest.raises(ValueError, match="does not fit"):
+        build_atlas(app, [('a', 'font-6.png')])
+
+
+def test_build_atlas_texture_failure(app, monkeypatch):
+    monkeypatch.setattr(
+        sdl2, 'SDL_CreateTextureFromSurface', lambda renderer, surface: None)
+    with pytest.raises(ValueError, match="can't create atlas page"):
+        build_atlas(app, [('a', 'font-6.png')])
+
+
+def test_released_page_is_destroyed_by_the_app(app):
+    result = build_atlas(app, [('a', 'font-6.png'), ('b', 'font-6.png')])
+    page = result.pages[0]
+    texture = page.texture
+    generation = app._display_generation
+    app._rendering = True
+    try:
+        app.resources['a'].close()
+        assert page.texture
+        app.resources['b'].close()
+        # NOTE: the page can still be replayed until the end of the frame
+        assert page.texture is None
+        assert app._garbage == [texture]
+        assert app._display_generation > generation
+    finally:
+        app._rendering = False
@@ -0,0 +1,71 @@
+import ctypes
+
+from sdl2ui.audio import RingBuffer
+
+
+def _write(ring, data):
+    source = (ctypes.c_uint8 * len(data))(*data)
+    return ring.write(ctypes.addressof(source), len(data))
+
+
+def _read(ring, length):
+    dest = (ctypes.c_uint8 * length)()
+    read = ring.read(ctypes.addressof(dest), length)
+    return bytes(dest[:read])
+
+
+def test_write_and_read():
+    ring = RingBuffer(8)
+    assert _write(ring, b"abc") == 3
+    assert ring.fill_level == 3
+    assert ring.free == 5
+    assert _read(ring, 3) == b"abc"
+    assert ring.fill_level == 0
+
+
+def test_write_straddles_the_end():
+    ring = RingBuffer(8)
+    _write(ring, b"123456")
+    assert _read(ring, 4) == b"1234"
+    # NOTE: 2 bytes left at the end of the buffer, 3 at its beginning
+    assert _write(ring, b"abcde") == 5
+    assert bytes(ring.data[:3]) == b"cde"
+    assert bytes(ring.data[6:]) == b"ab"
+    assert _read(ring, 7) == b"56abcde"
+
+
+def test_read_straddles_the_end_in_pieces():
+    ring = RingBuffer(5)
+    data = bytes(range(50))
+    out = b""
+    for i in range(0, 50, 3):
+        _write(ring, data[i:i + 3])
+        out += _read(ring, 2 if i % 2 else 4)
+    out += _read(ring, 5)
+    assert out == data
+
+
+def test_write_is_truncated_when_full():
+    ring = RingBuffer(4)
+    assert _write(ring, b"abcdef") == 4
+    assert ring.free == 0
+    assert _write(ring, b"g") == 0
+    assert _read(ring, 8) == b"abcd"
+
+
+def test_underrun_reads_what_is_available():
+    ring = RingBuffer(8)
+    _write(ring, b"xy")
+    assert _read(ring, 6) == b"xy"
+    assert _read(ring, 6) == b""
+    assert ring.drained.is_set()
+
+
+def test_clear():
+    ring = RingBuffer(8)
+    _write(ring, b"abcdef")
+    ring.clear()
+    assert ring.fill_level == 0
+    assert ring.free == 8
+    assert _write(ring, b"12345678") == 8
+    assert _read(ring, 8) == b"12345678"
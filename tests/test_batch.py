@@ -0,0 +1,37 @@
+import ctypes
+
+import numpy
+import pytest
+import sdl2
+
+from sdl2ui.batch import has_render_geometry
+
+
+def _render(app, geometry, *args, **kwargs):
+    app.sprite_batch.geometry = geometry
+    sdl2.SDL_SetRenderDrawColor(app.renderer, 0, 0, 0, 0xff)
+    sdl2.SDL_RenderClear(app.renderer)
+    app.draw_batch('font-6', *args, **kwargs)
+    pixels = numpy.zeros((48, 64, 4), numpy.uint8)
+    assert sdl2.SDL_RenderReadPixels(
+        app.renderer, None, sdl2.SDL_PIXELFORMAT_RGBA32,
+        pixels.ctypes.data_as(ctypes.c_void_p), 64 * 4) == 0
+    return pixels
+
+
+@pytest.mark.skipif(
+    not has_render_geometry(), reason="SDL_RenderGeometry not available")
+@pytest.mark.parametrize('colors', [None, [(0xff, 0x80, 0x40, 0xff)] * 3])
+def test_batch_matches_the_copy_fallback(app, colors):
+    font = app.resources['font-6']
+    w, h = font.font_w, font.font_h
+    positions = [(0, 0), (10, 12), (30, 20)]
+    sources = [(0, 0, w, h), (w, 0, w, h), (5 * w, 0, w, h)]
+    sizes = [(w, h), (2 * w, 2 * h), (w, h)]
+    copies = _render(app, False, positions, sources, sizes, colors)
+    geometry = _render(app, True, positions, sources, sizes, colors)
+    assert (copies[:, :, :3] != 0).any()
+    # NOTE: SDL samples the texture of a geometry on its own, a few texels
+    #       of the sprites may differ
+    area = sum(x * y for x, y in sizes)
+    assert (copies != geometry).any(axis=2).sum() <= area * 0.05
@@ -0,0 +1,53 @@
+import ctypes
+import os
+import shutil
+
+import pytest
+import sdl2
+
+import sdl2ui
+from sdl2ui.app import App
+from sdl2ui.bundle import Bundle, build_bundle
+
+
+FONT = os.path.join(os.path.dirname(sdl2ui.__file__), 'data', 'font-6.png')
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    os.makedirs(str(tmp_path / 'assets' / 'images'))
+    shutil.copy(FONT, str(tmp_path / 'assets' / 'images' / 'logo.png'))
+    with open(str(tmp_path / 'assets' / 'readme.txt'), 'wb') as fileobj:
+        fileobj.write(b'hello bundle')
+    path = str(tmp_path / 'assets.bundle')
+    build_bundle(str(tmp_path / 'assets'), path)
+    return path
+
+
+def test_member_is_read_from_the_mapping(bundle_path):
+    bundle = Bundle(bundle_path)
+    try:
+        assert 'readme.txt' in bundle and 'images/logo.png' in bundle
+        rw = bundle.open_rw('readme.txt')
+        assert rw.contents.type == sdl2.SDL_RWOPS_MEMORY_RO
+        size = bundle.size('readme.txt')
+        data = ctypes.create_string_buffer(size)
+        assert sdl2.SDL_RWread(rw, data, 1, size) == size
+        assert data.raw == b'hello bundle'
+        sdl2.SDL_RWclose(rw)
+    finally:
+        bundle.close()
+
+
+def test_image_loads_from_a_mounted_bundle(bundle_path):
+    app = App(width=32, height=32, headless=True, bundles=[bundle_path])
+    try:
+        app.load_resource('logo', 'images/logo.png')
+        logo = app.resources['logo']
+        assert logo.bundle is app.bundles[0]
+        assert logo.texture
+        assert (logo.rect.w, logo.rect.h) == (
+            app.resources['font-6'].rect.w, app.resources['font-6'].rect.h)
+    finally:
+        app.quit()
+        app._clean_up()
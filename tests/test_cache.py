@@ -0,0 +1,70 @@
+from sdl2ui.cache import LRUCache
+from sdl2ui.resource import ResourceManager
+
+
+def test_least_recently_used_values_are_evicted():
+    evicted = []
+    cache = LRUCache(30, lambda key, value: evicted.append(key))
+    for key in "abc":
+        assert cache.put(key, key.upper(), 10)
+    assert cache.get("a") == "A"
+    assert cache.put("d", "D", 10)
+    assert evicted == ["b"]
+    assert not cache.put("e", "E", 31)
+    assert list(cache) == ["c", "a", "d"]
+    assert cache.size == 30
+
+
+def test_pinned_values_are_not_evicted():
+    pinned = set("a")
+    cache = LRUCache(
+        20, pinned=lambda key, value: key in pinned)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    assert not cache.reserve(20)
+    assert list(cache) == ["a"]
+    pinned.clear()
+    assert cache.reserve(20)
+    assert len(cache) == 0
+
+
+def test_pop_does_not_evict():
+    evicted = []
+    cache = LRUCache(None, lambda key, value: evicted.append(key))
+    cache.put("a", 1, 10)
+    assert cache.reserve(1000)
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    assert evicted == [] and cache.size == 0
+
+
+class Sized(object):
+    evictable = True
+
+    def __init__(self, size, pool=None):
+        self.size = size
+        self.pool = pool
+        self.closed = 0
+
+    def load(self):
+        self.closed -= 1
+
+    def close(self):
+        self.closed += 1
+
+
+def test_resource_pools_only_evict_their_own_resources():
+    manager = ResourceManager(None, budget=100, budgets={'samples': 20})
+    image = manager['image'] = Sized(50)
+    first = manager['first'] = Sized(10, 'samples')
+    manager['second'] = Sized(10, 'samples')
+    manager.acquire('first', 'owner')
+    manager['third'] = Sized(10, 'samples')
+    # NOTE: the acquired sample is kept, the oldest other one is evicted
+    assert not first.closed and not image.closed
+    assert manager.pool_size('samples') == 20
+    assert manager.size == 70
+    manager.release('first', 'owner')
+    manager['big'] = Sized(60)
+    assert image.closed == 1
+    assert manager.size == 80
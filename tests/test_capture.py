@@ -0,0 +1,47 @@
+import os
+import struct
+
+import pytest
+
+from sdl2ui.app import App
+
+
+@pytest.fixture
+def app():
+    app = App(width=16, height=8, headless=True)
+    yield app
+    app.stop_recording()
+    app.quit()
+    app._clean_up()
+
+
+def _index(path):
+    with open(path) as fileobj:
+        return [tuple(int(x) for x in line.split()) for line in fileobj]
+
+
+def test_record_png_frames(app, tmp_path):
+    path = str(tmp_path / "frames")
+    app.start_recording(path)
+    for i in range(3):
+        app._render_components()
+    recorder = app.stop_recording()
+    assert recorder.stats()['written'] == 3
+    index = _index(os.path.join(path, 'frames.txt'))
+    assert [x[0] for x in index] == [0, 1, 2]
+    assert [x[1] for x in index] == sorted(x[1] for x in index)
+    for i in range(3):
+        with open(os.path.join(path, 'frame-%06d.png' % i), 'rb') as fileobj:
+            data = fileobj.read()
+        assert data.startswith(b'\x89PNG\r\n\x1a\n')
+        assert struct.unpack('>II', data[16:24]) == (16, 8)
+
+
+def test_record_raw_frames(app, tmp_path):
+    path = str(tmp_path / "frames.rgb")
+    app.start_recording(path, 'raw')
+    for i in range(2):
+        app._render_components()
+    app.stop_recording()
+    assert [x[0] for x in _index(path + '.txt')] == [0, 1]
+    assert os.path.getsize(path) == 2 * 16 * 8 * 3
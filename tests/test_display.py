@@ -0,0 +1,116 @@
+import random
+
+import sdl2ui
+from sdl2ui.app import App
+from sdl2ui.display import _overlaps, sort_commands
+
+
+def _command(texture, x, y, w=8, h=8, tint=(0xff, 0xff, 0xff)):
+    return ((texture, tint), texture, None, (x, y, w, h))
+
+
+def _state_changes(commands):
+    return sum(
+        1 for a, b in zip(commands, commands[1:]) if a[0] != b[0])
+
+
+def test_overlapping_commands_keep_their_order():
+    rng = random.Random(42)
+    # NOTE: the submission index is appended to the commands to find them
+    commands = [
+        _command(
+            rng.randrange(4), rng.randrange(200), rng.randrange(200),
+            rng.randrange(1, 40), rng.randrange(1, 40)) + (i,)
+        for i in range(500)]
+    result = sort_commands(commands)
+    assert sorted(result) == sorted(commands)
+    position = dict((x[4], i) for i, x in enumerate(result))
+    for a in commands:
+        for b in commands[a[4] + 1:]:
+            if _overlaps(a[3], b[3]):
+                assert position[a[4]] < position[b[4]], (a, b)
+    assert _state_changes(result) < _state_changes(commands)
+
+
+def test_disjoint_commands_are_grouped_by_state():
+    commands = [
+        _command(i % 3, (i % 20) * 10, (i // 20) * 10)
+        for i in range(200)]
+    result = sort_commands(commands)
+    assert _state_changes(commands) == 199
+    assert _state_changes(result) == 2
+    for state in (0, 1, 2):
+        same = [x for x in result if x[1] == state]
+        assert same == [x for x in commands if x[1] == state]
+
+
+def test_overlap_splits_a_group():
+    a1 = _command(1, 0, 0)
+    b = _command(2, 4, 4)
+    a2 = _command(1, 6, 6)
+    far = _command(2, 100, 100)
+    assert sort_commands([a1, b, a2, far]) == [a1, b, far, a2]
+
+
+def test_tint_is_part_of_the_state():
+    red = _command(1, 0, 0, tint=(0xff, 0, 0))
+    white = _command(1, 20, 0)
+    red2 = _command(1, 40, 0, tint=(0xff, 0, 0))
+    assert sort_commands([red, white, red2]) == [red, red2, white]
+
+
+def test_fullscreen_commands_are_barriers():
+    a1 = _command(1, 0, 0)
+    full = ((2, (0xff, 0xff, 0xff)), 2, None, None)
+    a2 = _command(1, 50, 50)
+    assert sort_commands([a1, full, a2]) == [a1, full, a2]
+
+
+def test_large_rects_are_barriers():
+    a1 = _command(1, 0, 0)
+    big = _command(2, -1000, -1000, 4000, 4000)
+    a2 = _command(1, 50, 50)
+    assert sort_commands([a1, big, a2]) == [a1, big, a2]
+
+
+class Static(sdl2ui.Component):
+    retained = True
+
+    def render(self):
+        self.app.resources['font-6'].draw(x=0, y=0)
+
+
+class Counter(sdl2ui.Component):
+    def init(self):
+        self.frame = 0
+
+    def render(self):
+        self.frame += 1
+        self.app.write('font-6', 0, 16, "frame %03d" % self.frame)
+
+
+def test_text_cache_eviction_keeps_the_other_display_lists():
+    app = App(width=64, height=48, headless=True, display_list=True)
+    try:
+        font = app.resources['font-6']
+        # NOTE: a single text fits in the cache, every frame evicts one
+        font.text_cache.budget = 9 * font.font_w * font.font_h * 4
+        static = app.add_component(Static)
+        counter = app.add_component(Counter)
+        static.enable()
+        counter.enable()
+        app._update_active_components()
+        app._render_components()
+        display_list = static._display_list
+        generation = app._display_generation
+        for i in range(5):
+            app._render_components()
+        assert len(font.text_cache) == 1
+        assert app._display_generation == generation
+        assert static._display_list is display_list
+        # NOTE: a text evicted while a display list still draws it
+        font.text_cache.clear()
+        assert app._display_generation > generation
+    finally:
+        app.quit()
+        app._clean_up()
@@ -0,0 +1,84 @@
+import ctypes
+
+import pytest
+import sdl2
+
+from sdl2ui.app import App
+
+
+@pytest.fixture
+def frame_app():
+    app = App(width=16, height=12, zoom=3, frame_target=True, headless=True)
+    yield app
+    app.quit()
+    app._clean_up()
+
+
+def _window_pixels(app):
+    w = ctypes.c_int()
+    h = ctypes.c_int()
+    sdl2.SDL_SetRenderTarget(app.renderer, None)
+    try:
+        sdl2.SDL_GetRendererOutputSize(
+            app.renderer, ctypes.byref(w), ctypes.byref(h))
+        pixels = (ctypes.c_uint32 * (w.value * h.value))()
+        sdl2.SDL_RenderReadPixels(
+            app.renderer, None, sdl2.SDL_PIXELFORMAT_ARGB8888,
+            pixels, w.value * 4)
+    finally:
+        sdl2.SDL_SetRenderTarget(app.renderer, app._frame)
+    return [pixels[y * w.value:(y + 1) * w.value] for y in range(h.value)]
+
+
+def _resize(app, w, h):
+    sdl2.SDL_SetWindowSize(app.window, w, h)
+    event = sdl2.SDL_Event()
+    event.type = sdl2.SDL_WINDOWEVENT
+    event.window.event = sdl2.SDL_WINDOWEVENT_SIZE_CHANGED
+    app._window_event(event)
+
+
+def test_frame_is_scaled_to_the_window(frame_app):
+    app = frame_app
+    assert app._frame is not None
+    assert (app.viewport.w, app.viewport.h) == (16, 12)
+    assert app.frame_scale == 3
+    assert (app.frame_rect.x, app.frame_rect.y) == (0, 0)
+    assert (app.frame_rect.w, app.frame_rect.h) == (48, 36)
+    sdl2.SDL_SetRenderDrawColor(app.renderer, 0xff, 0, 0, 0xff)
+    sdl2.SDL_RenderClear(app.renderer)
+    app._present()
+    rows = _window_pixels(app)
+    assert len(rows) == 36 and len(rows[0]) == 48
+    assert all(pixel == 0xffff0000 for row in rows for pixel in row)
+
+
+def test_frame_is_letterboxed_with_an_integer_scale(frame_app):
+    app = frame_app
+    _resize(app, 70, 40)
+    # NOTE: 70 // 16 == 4 but 40 // 12 == 3, the smallest scale fits
+    assert app.frame_scale == 3
+    assert (app.frame_rect.w, app.frame_rect.h) == (48, 36)
+    assert (app.frame_rect.x, app.frame_rect.y) == (11, 2)
+    assert app._present_pending
+    sdl2.SDL_SetRenderDrawColor(app.renderer, 0xff, 0, 0, 0xff)
+    sdl2.SDL_RenderClear(app.renderer)
+    app._present()
+    assert not app._present_pending
+    rows = _window_pixels(app)
+    assert len(rows) == 40 and len(rows[0]) == 70
+    for y, row in enumerate(rows):
+        for x, pixel in enumerate(row):
+            inside = 11 <= x < 59 and 2 <= y < 38
+            assert pixel == (0xffff0000 if inside else 0xff000000), (x, y)
+    # NOTE: the frame is drawn at its own size whatever the window
+    assert (app.viewport.w, app.viewport.h) == (16, 12)
+
+
+def test_window_coordinates_to_the_frame(frame_app):
+    app = frame_app
+    _resize(app, 70, 40)
+    assert app.to_logical(11, 2) == (0, 0)
+    assert app.to_logical(13, 4) == (0, 0)
+    assert app.to_logical(14, 5) == (1, 1)
+    assert app.to_logical(58, 37) == (15, 11)
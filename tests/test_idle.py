@@ -0,0 +1,63 @@
+import threading
+import time
+
+import sdl2
+
+import sdl2ui
+
+
+class Animated(sdl2ui.Component):
+    animated = True
+
+
+def _settle(app):
+    app._poll_events()
+    app._update_active_components()
+    app._touched = False
+    app._render_pending = False
+    app._present_pending = False
+
+
+def test_idle_blocks_until_the_next_timer(app):
+    fired = []
+    app.add_timer(60, lambda: fired.append(True))
+    _settle(app)
+    assert app._can_idle()
+    start = time.time()
+    app._wait_events()
+    elapsed = time.time() - start
+    assert 0.04 <= elapsed < 0.5
+    app._call_timers(sdl2.SDL_GetTicks())
+    assert fired == [True]
+
+
+def test_idle_wakes_up_on_an_event(app):
+    received = []
+    event_type = sdl2.SDL_RegisterEvents(1)
+    app.register_event_handler(event_type, received.append)
+    _settle(app)
+
+    def push():
+        event = sdl2.SDL_Event()
+        event.type = event_type
+        sdl2.SDL_PushEvent(event)
+    pusher = threading.Timer(0.05, push)
+    pusher.start()
+    start = time.time()
+    try:
+        app._wait_events()
+    finally:
+        pusher.join()
+    elapsed = time.time() - start
+    assert 0.03 <= elapsed < 1.0
+    assert len(received) == 1
+
+
+def test_animated_component_prevents_idle(app):
+    component = app.add_component(Animated)
+    component.enable()
+    _settle(app)
+    assert not app._can_idle()
+    component.disable()
+    _settle(app)
+    assert app._can_idle()
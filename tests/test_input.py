@@ -0,0 +1,40 @@
+import ctypes
+
+import sdl2
+
+from sdl2ui.input import ButtonState
+
+
+def test_button_edges():
+    state = ButtonState(4)
+    state.update(bytearray([0, 1, 0, 1]))
+    assert list(state.held) == [0, 1, 0, 1]
+    assert list(state.pressed) == [0, 1, 0, 1]
+    assert list(state.released) == [0, 0, 0, 0]
+    state.update(bytearray([1, 1, 0, 0]))
+    assert list(state.pressed) == [1, 0, 0, 0]
+    assert list(state.released) == [0, 0, 0, 1]
+    # NOTE: the edges only last one frame
+    state.update(bytearray([1, 1, 0, 0]))
+    assert list(state.held) == [1, 1, 0, 0]
+    assert not any(state.pressed) and not any(state.released)
+
+
+def test_keyboard_snapshot_is_taken_once_per_frame(app):
+    keyboard = app.input.keyboard
+    # NOTE: the state of SDL is only changed by real key strokes, the
+    #       snapshot is taken from a buffer of the test instead
+    live = (ctypes.c_uint8 * keyboard.size)()
+    keyboard._live = live
+    key = sdl2.SDL_SCANCODE_A
+    live[key] = 1
+    app.input.update()
+    assert app.input.pressed(key) and app.input.held(key)
+    # NOTE: a change after the snapshot is seen at the next frame only
+    live[key] = 0
+    assert app.input.held(key)
+    app.input.update()
+    assert app.input.released(key) and not app.input.held(key)
+    assert not app.input.pressed(key)
+    app.input.update()
+    assert not app.input.released(key)
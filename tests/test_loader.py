@@ -0,0 +1,42 @@
+import threading
+
+from sdl2ui.resource import Image
+
+
+def test_shutdown_frees_decoded_data(app, monkeypatch):
+    discarded = []
+    monkeypatch.setattr(
+        Image, 'discard', lambda self, image: discarded.append(image))
+    futures = [
+        app.load_resource_async('font-%d' % i, 'font-6.png')
+        for i in range(4)]
+    app.loader._executor.shutdown(wait=True)
+    assert len(app.loader._decoded) == 4
+    app.loader.shutdown()
+    assert len(discarded) == 4
+    assert all(future.cancelled() for future in futures)
+    assert not app.loader._decoded
+
+
+def test_shutdown_frees_data_decoded_after_cancellation(app, monkeypatch):
+    discarded = []
+    monkeypatch.setattr(
+        Image, 'discard', lambda self, image: discarded.append(image))
+    started = threading.Event()
+    release = threading.Event()
+    decode = Image.decode
+
+    def slow_decode(self):
+        started.set()
+        release.wait(5)
+        return decode(self)
+    monkeypatch.setattr(Image, 'decode', slow_decode)
+    app.loader.workers = 1
+    running = app.load_resource_async('running', 'font-6.png')
+    queued = app.load_resource_async('queued', 'font-6.png')
+    assert started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    app.loader.shutdown()
+    assert len(discarded) == 1
+    assert running.cancelled()
+    assert queued.cancelled()
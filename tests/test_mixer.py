@@ -0,0 +1,116 @@
+import wave
+
+import pytest
+
+from sdl2ui.mixer import Audio, Channel, Mixer, Music
+
+
+@pytest.fixture
+def wav(tmp_path):
+    def make(name, frames=2000):
+        path = str(tmp_path / name)
+        fileobj = wave.open(path, 'wb')
+        fileobj.setnchannels(2)
+        fileobj.setsampwidth(2)
+        fileobj.setframerate(22050)
+        fileobj.writeframes(b'\x00\x01' * 2 * frames)
+        fileobj.close()
+        return path
+    return make
+
+
+@pytest.fixture
+def mixer(app):
+    mixer = app.add_component(Mixer)
+    mixer.enable()
+    app._update_active_components()
+    return mixer
+
+
+def test_finished_channel_releases_its_sample(app, mixer, wav):
+    app.load_resource('beep', wav('beep.wav'))
+    channel = mixer.open('beep')
+    assert app.resources.references('beep') == 1
+    channel.enable()
+    app._update_active_components()
+    assert channel.channel is not None
+    channel.halt()
+    app._poll_events()
+    assert channel.finished
+    assert app.resources.references('beep') == 0
+
+
+def test_quit_releases_the_channels_that_never_played(app, mixer, wav):
+    app.load_resource('beep', wav('beep.wav'))
+    mixer.open('beep')
+    mixer.open('beep')
+    assert app.resources.references('beep') == 2
+    mixer.quit(None)
+    assert app.resources.references('beep') == 0
+
+
+def test_replacing_a_resource_closes_it(app, mixer, wav, monkeypatch):
+    closed = []
+    monkeypatch.setattr(Audio, 'close', lambda self: closed.append(self))
+    app.load_resource('beep', wav('beep.wav'))
+    previous = app.resources['beep']
+    app.load_resource('beep', wav('other.wav'))
+    assert closed == [previous]
+
+
+def test_acquired_resource_can_not_be_replaced(app, mixer, wav):
+    app.load_resource('beep', wav('beep.wav'))
+    mixer.open('beep')
+    with pytest.raises(ValueError):
+        app.load_resource('beep', wav('other.wav'))
+
+
+def test_large_sample_still_plays_in_a_channel(app, mixer, wav):
+    app.load_resource('loop', wav('loop.wav', frames=300000))
+    assert isinstance(app.resources['loop'], Audio)
+    channel = mixer.open('loop')
+    channel.enable()
+    app._update_active_components()
+    assert channel.channel is not None
+    assert mixer.voices[channel.channel] is channel
+
+
+def test_music_threshold_is_opt_in(app, mixer, wav):
+    app.props['music_threshold'] = 1024 * 1024
+    app.load_resource('theme', wav('theme.wav', frames=300000))
+    app.load_resource('beep', wav('beep.wav'))
+    assert isinstance(app.resources['theme'], Music)
+    assert isinstance(app.resources['beep'], Audio)
+
+
+def test_music_can_not_be_opened_in_a_channel(app, mixer, wav):
+    app.load_resource('theme', wav('theme.wav'), hint='music')
+    with pytest.raises(TypeError):
+        mixer.open('theme')
+    assert app.resources.references('theme') == 0
+    assert not [x for x in mixer.components if isinstance(x, Channel)]
+
+
+def test_limit_of_zero_never_plays(app, mixer, wav):
+    app.load_resource('beep', wav('beep.wav'))
+    mixer.limits['beep'] = 0
+    channel = mixer.open('beep')
+    channel.enable()
+    app._update_active_components()
+    assert channel.channel is None
+    assert channel.finished
+    assert app.resources.references('beep') == 0
+
+
+def test_limit_reached_steals_the_oldest_voice(app, mixer, wav):
+    app.load_resource('beep', wav('beep.wav', frames=200000))
+    mixer.limits['beep'] = 2
+    channels = [mixer.open('beep') for i in range(3)]
+    for channel in channels:
+        channel.enable()
+        app._update_active_components()
+    app._poll_events()
+    assert channels[0].finished
+    assert [x.channel is not None for x in channels] == [False, True, True]
+    assert sorted(mixer.voices.index(x) for x in channels[1:]) == sorted(
+        x.channel for x in channels[1:])
@@ -0,0 +1,35 @@
+import time
+
+import sdl2
+
+from sdl2ui.pacing import FramePacer
+
+
+def _now():
+    return sdl2.SDL_GetPerformanceCounter()
+
+
+def test_wait_returns_on_the_deadline():
+    pacer = FramePacer(fps=100)
+    start = _now()
+    for i in range(10):
+        deadline = pacer.deadline
+        pacer.wait()
+        assert _now() >= deadline
+        assert not pacer.late
+    # NOTE: the deadlines are absolute, the frames do not drift
+    elapsed = (_now() - start) / pacer.freq
+    assert 0.1 <= elapsed < 0.15
+    assert pacer.frames == 10 and pacer.dropped == 0
+
+
+def test_overrun_drops_frames_and_realigns():
+    pacer = FramePacer(fps=100, max_skip=1)
+    time.sleep(0.035)
+    pacer.wait()
+    assert pacer.late
+    assert pacer.dropped >= 2
+    assert pacer.deadline > _now()
+    assert pacer.deadline - _now() <= pacer.period
+    assert pacer.skip_render()
+    assert not pacer.skip_render()
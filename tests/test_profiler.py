@@ -0,0 +1,73 @@
+import sdl2ui
+
+
+class Base(sdl2ui.Component):
+    def peek(self):
+        self.peeked.append(Base)
+        return self.props['base']
+
+
+class Child(Base):
+    def init(self):
+        self.peeked = []
+
+    def peek(self):
+        self.peeked.append(Child)
+        return self.props['child']
+
+
+def _peek(app, components):
+    for component in components:
+        component._dirty = False
+        del component.peeked[:]
+    result = app._peek_components()
+    return (
+        result,
+        [component._dirty for component in components],
+        [list(component.peeked) for component in components])
+
+
+def test_profiled_peek_touches_the_same_components(app):
+    values = [
+        (False, False), (True, False), (False, True), (0, 0), (0, 2),
+        (1, 2), (False, 0)]
+    components = [
+        app.add_component(Child, base=base, child=child)
+        for base, child in values]
+    for component in components:
+        component.enable()
+    app._update_active_components()
+    app._touched = False
+    unprofiled = _peek(app, components)
+    app.profiler.enable()
+    profiled = _peek(app, components)
+    assert profiled == unprofiled
+    assert unprofiled[1] == [False, True, True, False, True, True, False]
+    assert unprofiled[2][0] == [Child, Base]
+    assert len(list(app.profiler.events())) == len(components) + 1
+
+
+def test_profiled_peek_returning_false_touches_nothing(app):
+    component = app.add_component(Child, base=False, child=False)
+    component.enable()
+    app._update_active_components()
+    app._touched = False
+    app.profiler.enable()
+    assert _peek(app, [component]) == (False, [False], [[Child, Base]])
+
+
+class Drawn(Child):
+    def render(self):
+        self.rendered = True
+
+
+def test_profiled_render(app):
+    component = app.add_component(Drawn, base=True, child=False)
+    component.enable()
+    app._update_active_components()
+    app.profiler.enable()
+    app._render_components()
+    assert component.rendered
+    assert 'Drawn.render' in [
+        name for name, category, _, _, _ in app.profiler.events()
+        if category == 'render']
@@ -0,0 +1,35 @@
+import math
+
+import numpy
+import pytest
+import sdl2
+
+from sdl2ui.synth import Sound, SoftwareMixer
+
+
+@pytest.fixture(params=['linear', 'polyphase'])
+def synth(request, app):
+    sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_AUDIO)
+    return app.add_component(
+        SoftwareMixer, frequency=22050, format=sdl2.AUDIO_F32SYS, channels=1,
+        chunksize=512, resampling=request.param)
+
+
+def test_looped_sound_has_no_discontinuity(synth):
+    # NOTE: 4 periods of a cosine, the loop point is on a period boundary so
+    #       the looped output must stay on the same cosine
+    period = 50
+    frames = numpy.arange(4 * period)
+    freq = synth.audio_spec.freq
+    sound = Sound(0.5 * numpy.cos(2 * math.pi * frames / period), freq)
+    pitch = 0.7
+    synth.play(sound, pitch=pitch, loops=-1)
+    output = numpy.zeros((512, 1), numpy.float32)
+    played = []
+    for i in range(4):
+        synth.fill(output)
+        played.append(output[:, 0].copy())
+    played = numpy.concatenate(played)
+    expected = 0.5 * numpy.cos(
+        2 * math.pi * numpy.arange(len(played)) * pitch / period)
+    assert numpy.abs(played - expected).max() < 0.01
@@ -0,0 +1,105 @@
+from sdl2ui.timer import TimerQueue
+
+
+def test_timers_fire_in_deadline_order():
+    queue = TimerQueue()
+    fired = []
+    for deadline in (30, 10, 20, 10):
+        queue.add(deadline, lambda d=deadline: fired.append(d))
+    queue.call(15)
+    assert fired == [10, 10]
+    queue.call(100)
+    assert fired == [10, 10, 20, 30]
+    assert len(queue) == 0
+    assert queue.next_deadline() is None
+
+
+def test_same_deadline_keeps_insertion_order():
+    queue = TimerQueue()
+    fired = []
+    for name in "abc":
+        queue.add(5, lambda n=name: fired.append(n))
+    queue.call(5)
+    assert fired == ["a", "b", "c"]
+
+
+def test_cancel_before_fire():
+    queue = TimerQueue()
+    fired = []
+    timer = queue.add(10, lambda: fired.append("cancelled"))
+    queue.add(20, lambda: fired.append("kept"))
+    timer.cancel()
+    assert not timer.pending
+    assert len(queue) == 1
+    assert queue.next_deadline() == 20
+    queue.call(100)
+    assert fired == ["kept"]
+
+
+def test_cancel_during_callback():
+    queue = TimerQueue()
+    fired = []
+    later = queue.add(10, lambda: fired.append("later"))
+    queue.add(5, lambda: (fired.append("first"), later.cancel()))
+    queue.call(10)
+    assert fired == ["first"]
+    assert len(queue) == 0
+
+
+def test_repeating_timer_cancels_itself():
+    queue = TimerQueue()
+    fired = []
+
+    def callback():
+        fired.append(timer.deadline)
+        if len(fired) == 2:
+            timer.cancel()
+    timer = queue.add(10, callback, interval=10)
+    for ticks in range(0, 100, 5):
+        queue.call(ticks)
+    assert fired == [20, 30]
+    assert not timer.pending
+
+
+def test_repeating_timer_does_not_drift():
+    queue = TimerQueue()
+    fired = []
+    queue.add(10, lambda: fired.append(ticks), interval=10)
+    # NOTE: the loop is late by 3 ticks every time, the deadlines stay on
+    #       the multiples of the interval
+    for ticks in (13, 23, 33):
+        queue.call(ticks)
+    assert fired == [13, 23, 33]
+    assert queue.next_deadline() == 40
+
+
+def test_repeating_timer_skips_missed_intervals():
+    queue = TimerQueue()
+    fired = []
+    queue.add(10, lambda: fired.append(ticks), interval=10)
+    ticks = 55
+    queue.call(ticks)
+    assert fired == [55]
+    assert queue.next_deadline() == 60
+
+
+def test_timers_added_by_callbacks_wait_next_pass():
+    queue = TimerQueue()
+    fired = []
+    queue.add(5, lambda: queue.add(0, lambda: fired.append("nested")))
+    queue.call(10)
+    assert fired == []
+    queue.call(10)
+    assert fired == ["nested"]
+
+
+def test_compaction_keeps_pending_timers():
+    queue = TimerQueue()
+    fired = []
+    timers = [queue.add(i, lambda i=i: fired.append(i)) for i in range(200)]
+    for timer in timers[:150]:
+        timer.cancel()
+    assert len(queue) == 50
+    assert len(queue._heap) < 200
+    queue.call(1000)
+    assert fired == list(range(150, 200))